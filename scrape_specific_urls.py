@@ -2,9 +2,16 @@ import asyncio
 import os
 import re
 import argparse
+import hashlib
+import json
+import multiprocessing
 import sys
+import time
+import uuid
+from functools import lru_cache, partial
 from urllib.parse import urlparse
-from typing import List
+from typing import List, Dict, Any, Optional, Tuple, Callable
+import requests
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, BrowserConfig
 from crawl4ai.content_filter_strategy import PruningContentFilter, BM25ContentFilter
 from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
@@ -33,138 +40,581 @@ PRUNING_THRESHOLD = 0.35  # 0.0 (keep more) to 1.0 (prune more)
 PRUNING_TYPE = "dynamic"  # "fixed" or "dynamic"
 MIN_WORD_THRESHOLD = 5   # Minimum words per block to keep
 
+# Number of pages crawled at the same time (one browser tab each)
+MAX_CONCURRENT = 5
+
+# Number of processes the URL list is split across (1 = single process)
+WORKERS = 1
+
+# Pages scraped less than this many seconds ago are reused instead of crawled
+# again. If the server sent ETag / Last-Modified, a conditional request checks
+# first that the page hasn't changed. 0 disables the cache.
+CACHE_TTL = 60 * 60
+
+# Skip images, fonts and media when loading pages (they don't end up in the markdown)
+TEXT_MODE = True
+# Set to False for static sites to skip JavaScript execution entirely
+JAVASCRIPT_ENABLED = True
+
 # =====================
 
-def get_domain_folder(url: str) -> str:
-    """Get a domain-specific folder for storing scraped content."""
-    parsed = urlparse(url)
-    domain = parsed.netloc.replace(":", "_")
+# Index of previously scraped pages: cache key -> validators + markdown path
+CACHE_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".crawl_cache.json")
+
+# Keep-alive session for the cache's conditional requests
+_HTTP = requests.Session()
+
+# Markdown is written to disk in chunks of this many bytes
+WRITE_CHUNK_SIZE = 64 * 1024
+
+# Most files handed to the writer thread in one go
+WRITE_BATCH_SIZE = 32
+
+# Keep Windows from translating newlines in markdown written with os.write
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+# Characters of markdown shown in a result's content_preview
+PREVIEW_CHARS = 500
+
+# Characters not allowed in generated filenames
+_SANITIZE_RE = re.compile(r'[^a-zA-Z0-9_\-]+')
+
+@lru_cache(maxsize=4096)
+def _parse_url(url: str):
+    """Parse a URL once; it is looked at again for its folder, filename and host."""
+    return urlparse(url)
+
+def _folder_for_netloc(domain: str) -> str:
+    """Create (if needed) and return the folder for a domain."""
     script_dir = os.path.dirname(os.path.abspath(__file__))
     folder = os.path.join(script_dir, domain)
     os.makedirs(folder, exist_ok=True)
     return folder
 
+def get_domain_folder(url: str) -> str:
+    """Get a domain-specific folder for storing scraped content."""
+    return _folder_for_netloc(_parse_url(url).netloc.replace(":", "_"))
+
+def prepare_domain_folders(urls: List[str]) -> Dict[str, str]:
+    """Create every domain folder of a batch up front; returns the folder of each URL."""
+    # Each domain's folder is created once per batch, not once per URL; nothing
+    # is kept between batches, so a folder deleted in between is made again
+    by_domain = {}
+    folders = {}
+    for url in urls:
+        domain = _parse_url(url).netloc.replace(":", "_")
+        if domain not in by_domain:
+            by_domain[domain] = _folder_for_netloc(domain)
+        folders[url] = by_domain[domain]
+    return folders
+
 def url_to_filename(url: str) -> str:
     """Convert URL to a valid filename."""
-    parsed = urlparse(url)
+    parsed = _parse_url(url)
     path = parsed.path.strip("/").replace("/", "_")
     if not path:
         path = "index"
-    path = re.sub(r'[^a-zA-Z0-9_\-]', '', path)
+    path = _SANITIZE_RE.sub('', path)
     return path + ".md"
 
+def write_markdown_files(files: List[Tuple[str, str]],
+                         chunk_size: int = WRITE_CHUNK_SIZE) -> List[Tuple[Optional[str], Optional[Tuple[int, int]]]]:
+    """
+    Write a batch of (path, markdown) pairs with plain os.open/os.write calls,
+    leaving the flush to the OS. Returns (error message or None, file
+    signature or None) per file; see file_signature.
+    """
+    outcomes = []
+    for path, content in files:
+        try:
+            data = memoryview(content.encode("utf-8"))
+            fd = os.open(path, _WRITE_FLAGS, 0o644)
+            try:
+                for start in range(0, len(data), chunk_size):
+                    chunk = data[start:start + chunk_size]
+                    while chunk:
+                        chunk = chunk[os.write(fd, chunk):]
+                stat = os.fstat(fd)
+            finally:
+                os.close(fd)
+            outcomes.append((None, (stat.st_size, stat.st_mtime_ns)))
+        except (OSError, UnicodeError) as e:
+            outcomes.append((str(e), None))
+    return outcomes
+
+def make_preview(content: str) -> str:
+    """Return the content_preview of a page's markdown."""
+    return content[:PREVIEW_CHARS] + "..." if len(content) > PREVIEW_CHARS else content
+
+def read_preview(path: str) -> Tuple[int, str]:
+    """
+    Return (size in bytes, preview) of a saved markdown file, reading only
+    its first few KB instead of decoding the whole file.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(PREVIEW_CHARS * 4)  # Enough bytes for PREVIEW_CHARS UTF-8 characters
+    preview = head.decode("utf-8", errors="ignore")[:PREVIEW_CHARS]
+    if size > len(preview.encode("utf-8")):
+        preview += "..."
+    return size, preview
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """(size, mtime in ns) of a saved file, or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def file_digest(path: str) -> Optional[str]:
+    """SHA-1 of a saved file's bytes, or None if it can't be read."""
+    h = hashlib.sha1()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(partial(f.read, WRITE_CHUNK_SIZE), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+def filter_urls(urls: List[str], include: Optional[List[str]] = None,
+                exclude: Optional[List[str]] = None) -> List[str]:
+    """
+    Drop duplicate URLs (keeping the first occurrence) and, when patterns are
+    given, keep only URLs matching an include regex and no exclude regex.
+    """
+    inc = re.compile('|'.join(f'(?:{p})' for p in include)) if include else None
+    exc = re.compile('|'.join(f'(?:{p})' for p in exclude)) if exclude else None
+    return [
+        url for url in dict.fromkeys(urls)
+        if (inc is None or inc.search(url)) and (exc is None or not exc.search(url))
+    ]
+
+def cache_key(url: str, *settings) -> str:
+    """Key of a scraped page: its URL plus every setting that shapes the markdown."""
+    return hashlib.sha1(json.dumps([url, *settings]).encode("utf-8")).hexdigest()
+
+def load_cache_index() -> Dict[str, Dict[str, Any]]:
+    """Load the cache index, or an empty one if it is missing or unreadable."""
+    try:
+        with open(CACHE_INDEX_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache_index(entries: Dict[str, Dict[str, Any]], written_paths=()):
+    """
+    Merge new entries into the on-disk cache index (written atomically).
+    
+    Every settings combination of a URL shares one file, so older entries
+    pointing at a path in written_paths describe markdown that has just
+    been overwritten and are dropped.
+    """
+    if not entries and not written_paths:
+        return
+    written_paths = set(written_paths)
+    index = {key: entry for key, entry in load_cache_index().items()
+             if entry.get("path") not in written_paths}
+    index.update(entries)
+    tmp_path = f"{CACHE_INDEX_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, CACHE_INDEX_PATH)
+
+def is_unchanged(url: str, entry: Dict[str, Any]) -> bool:
+    """Send a conditional HEAD request with the stored validators; True on 304 Not Modified."""
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    if not headers:
+        return False
+    try:
+        resp = _HTTP.head(url, headers=headers, allow_redirects=True, timeout=10)
+    except requests.RequestException:
+        return False
+    return resp.status_code == 304
+
+# Fields of a result record before the URL is scraped
+_EMPTY_RESULT = {
+    "success": False,
+    "error": None,
+    "url": None,
+    "saved_path": None,
+    "markdown_type": None,
+    "content_length": 0,
+    "content_preview": None,
+    "domain": None
+}
+
+def new_result(url: str, **fields) -> Dict[str, Any]:
+    """Return the result record for a URL that has not been scraped (yet), with optional overrides."""
+    return dict(_EMPTY_RESULT, url=url, domain=_parse_url(url).netloc, **fields)
+
+def build_browser_config(text_mode: bool = TEXT_MODE, java_script_enabled: bool = JAVASCRIPT_ENABLED) -> BrowserConfig:
+    """Browser settings shared by every scrape."""
+    extra_args = ["--disable-gpu", "--disable-dev-shm-usage", "--no-sandbox"]
+    if text_mode:
+        # Images, fonts and media are never part of the markdown: don't download them
+        extra_args.append("--blink-settings=imagesEnabled=false")
+    return BrowserConfig(
+        headless=True,
+        verbose=True,
+        java_script_enabled=java_script_enabled,
+        text_mode=text_mode,
+        extra_args=extra_args
+    )
+
+@lru_cache(maxsize=16)
+def build_run_config(pruning_threshold=PRUNING_THRESHOLD, pruning_type=PRUNING_TYPE,
+                     min_word_threshold=MIN_WORD_THRESHOLD, use_query=False, query=None,
+                     query_threshold=1.2) -> CrawlerRunConfig:
+    """
+    Build the crawler run config for a set of filter settings.
+    
+    The config holds no per-URL state, so it is built once per distinct set of
+    settings and shared by every page and batch scraped with them.
+    """
+    # Create the content filter based on parameters
+    if use_query and query:
+        content_filter = BM25ContentFilter(
+            user_query=query,
+            bm25_threshold=query_threshold
+        )
+    else:
+        content_filter = PruningContentFilter(
+            threshold=pruning_threshold,
+            threshold_type=pruning_type,
+            min_word_threshold=min_word_threshold
+        )
+    
+    # Create DefaultMarkdownGenerator with our filter
+    md_generator = DefaultMarkdownGenerator(
+        content_filter=content_filter,
+        options={
+            "ignore_links": False,
+            "body_width": 0,  # No wrapping
+            "escape_html": True
+        }
+    )
+    
+    # Set crawler config with proper markdown generator
+    return CrawlerRunConfig(
+        markdown_generator=md_generator,
+        scraping_strategy=LXMLWebScrapingStrategy(),
+        cache_mode=None,
+        process_iframes=True,
+        remove_overlay_elements=True,
+        excluded_tags=["nav", "footer", "header", "style", "script"],
+        word_count_threshold=0,
+        verbose=False  # Set to False to reduce Unicode output that might cause issues
+    )
+
 async def scrape_urls(urls: List[str], pruning_threshold=PRUNING_THRESHOLD, pruning_type=PRUNING_TYPE, 
-                     min_word_threshold=MIN_WORD_THRESHOLD, use_query=False, query=None, query_threshold=1.2):
-    """Scrape a list of URLs and save the content as markdown files."""
+                     min_word_threshold=MIN_WORD_THRESHOLD, use_query=False, query=None, query_threshold=1.2,
+                     max_concurrent=MAX_CONCURRENT, crawler: Optional[AsyncWebCrawler] = None,
+                     text_mode=TEXT_MODE, java_script_enabled=JAVASCRIPT_ENABLED,
+                     cache_ttl=CACHE_TTL, force_rescrape=False,
+                     on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+                     cache_updates: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Scrape a list of URLs and save the content as markdown files.
+    
+    Returns one result record (see new_result) per URL, in input order. Pass an
+    already started crawler to reuse its browser; otherwise one is opened and
+    closed for this call, using text_mode and java_script_enabled.
+    
+    Pages scraped with the same settings less than cache_ttl seconds ago are
+    reused unless the server reports them as changed; force_rescrape crawls
+    every page again (and refreshes the cache).
+    
+    on_result, if given, is called with each record as soon as its URL is
+    done (in completion order), e.g. to report progress.
+    
+    If cache_updates is given, the new cache entries and the rewritten paths
+    are stored in it (as "entries" and "written_paths") instead of being
+    saved to the cache index, so the caller can save them once.
+    """
     if not urls:
         print("[ERROR] No URLs provided.")
-        return
+        return []
     
     try:
-        # Create the content filter based on parameters
         if use_query and query:
-            content_filter = BM25ContentFilter(
-                user_query=query,
-                bm25_threshold=query_threshold
-            )
             print(f"[INFO] Using BM25ContentFilter with query: '{query}' (threshold: {query_threshold})")
         else:
-            content_filter = PruningContentFilter(
-                threshold=pruning_threshold,
-                threshold_type=pruning_type,
-                min_word_threshold=min_word_threshold
-            )
             print(f"[INFO] Using PruningContentFilter (threshold: {pruning_threshold}, type: {pruning_type}, min_words: {min_word_threshold})")
+        crawl_config = build_run_config(pruning_threshold, pruning_type, min_word_threshold,
+                                        bool(use_query and query), query, query_threshold)
         
-        # Create DefaultMarkdownGenerator with our filter
-        md_generator = DefaultMarkdownGenerator(
-            content_filter=content_filter,
-            options={
-                "ignore_links": False,
-                "body_width": 0,  # No wrapping
-                "escape_html": True
-            }
-        )
+        def _mark_saved(record: Dict[str, Any], out_path: str, markdown_type: str,
+                        content_length: int, content_preview: str):
+            record.update(success=True, saved_path=out_path, markdown_type=markdown_type,
+                          content_length=content_length, content_preview=content_preview)
         
-        # Set browser config for better crawling
-        browser_config = BrowserConfig(
-            headless=True,
-            verbose=True,
-            java_script_enabled=True,
-            extra_args=["--disable-gpu", "--disable-dev-shm-usage", "--no-sandbox"]
-        )
-        
-        # Set crawler config with proper markdown generator
-        crawl_config = CrawlerRunConfig(
-            markdown_generator=md_generator,
-            scraping_strategy=LXMLWebScrapingStrategy(),
-            cache_mode=None,
-            process_iframes=True,
-            remove_overlay_elements=True,
-            excluded_tags=["nav", "footer", "header", "style", "script"],
-            word_count_threshold=0,
-            verbose=False  # Set to False to reduce Unicode output that might cause issues
-        )
-        
-        # Use a single browser session for all URLs
-        async with AsyncWebCrawler(config=browser_config) as crawler:
-            session_id = "batch_session"  # Reuse session for better performance
-            
-            for url in urls:
-                try:
+        async def _scrape_one(crawler: AsyncWebCrawler, url: str) -> Dict[str, Any]:
+            record = new_result(url)
+            try:
+                folder = folders[url]
+                filename = url_to_filename(url)
+                out_path = os.path.join(folder, filename)
+                
+                # Reuse the saved markdown if the page hasn't changed since it was scraped
+                key = cache_key(url, *settings_key)
+                entry = cache_index.get(key)
+                cached = (cache_ttl > 0 and not force_rescrape and entry is not None
+                          and time.time() - entry["stored_at"] < cache_ttl
+                          and entry.get("digest") is not None)
+                if cached:
+                    # The file is shared by every settings combination of the URL;
+                    # only reuse it if it still holds the markdown of this entry.
+                    # An unchanged size and mtime says so without reading the file.
+                    signature = await loop.run_in_executor(None, file_signature, entry["path"])
+                    if signature is None:
+                        cached = False
+                    elif list(signature) != entry.get("signature"):
+                        cached = await loop.run_in_executor(None, file_digest, entry["path"]) == entry["digest"]
+                        if cached:
+                            # Remember the signature so the next run skips the hash
+                            new_entries[key] = {**entry, "signature": list(signature)}
+                if cached and (entry.get("etag") or entry.get("last_modified")):
+                    cached = await loop.run_in_executor(None, is_unchanged, url, entry)
+                if cached:
+                    # Only the start of the file is needed for the preview
+                    size, preview = await loop.run_in_executor(None, read_preview, entry["path"])
                     print(f"\n[SCRAPE] {url}")
-                    folder = get_domain_folder(url)
-                    filename = url_to_filename(url)
-                    out_path = os.path.join(folder, filename)
-                    
-                    # Crawl the URL with our configuration
-                    result = await crawler.arun(
-                        url=url, 
-                        config=crawl_config,
-                        session_id=session_id
-                    )
-                    
-                    if not result.success:
-                        print(f"[ERROR] Failed to crawl {url}: {getattr(result, 'error_message', 'Unknown error')}")
-                        continue
-                    
-                    # Try to get the fit_markdown (filtered content)
-                    if (hasattr(result, 'markdown') and 
-                        hasattr(result.markdown, 'fit_markdown') and 
-                        result.markdown.fit_markdown and 
-                        len(result.markdown.fit_markdown.strip()) > 0):
-                        
-                        print(f"[INFO] Found fit_markdown ({len(result.markdown.fit_markdown)} chars)")
-                        markdown_content = result.markdown.fit_markdown
-                    
-                    # Fallback to raw_markdown if fit_markdown is empty
-                    elif (hasattr(result, 'markdown') and 
-                          hasattr(result.markdown, 'raw_markdown') and 
-                          result.markdown.raw_markdown):
-                        
-                        print(f"[INFO] Using raw_markdown ({len(result.markdown.raw_markdown)} chars)")
-                        markdown_content = result.markdown.raw_markdown
+                    print("[INFO] Unchanged since last scrape, using cached markdown")
+                    print(f"[SUCCESS] Saved to: {entry['path']}")
+                    _mark_saved(record, entry["path"], entry["markdown_type"],
+                                entry.get("content_length", size), preview)
+                    return record
+                
+                async with sem:
+                    session_id = idle_sessions.get_nowait()
+                    try:
+                        # Crawl the URL with our configuration
+                        result = await crawler.arun(
+                            url=url, 
+                            config=crawl_config,
+                            session_id=session_id
+                        )
+                    finally:
+                        idle_sessions.put_nowait(session_id)
+                
+                # Log only once the page is fully handled so each URL's lines stay
+                # contiguous even when several crawls are in flight
+                if not result.success:
+                    record["error"] = f"Failed to crawl {url}: {getattr(result, 'error_message', 'Unknown error')}"
+                    print(f"\n[SCRAPE] {url}")
+                    print(f"[ERROR] {record['error']}")
+                    return record
+                
+                # Try to get the fit_markdown (filtered content)
+                if (hasattr(result, 'markdown') and 
+                    hasattr(result.markdown, 'fit_markdown') and 
+                    result.markdown.fit_markdown and 
+                    len(result.markdown.fit_markdown.strip()) > 0):
                     
-                    else:
-                        print("[ERROR] No markdown content generated")
-                        continue
+                    info = f"[INFO] Found fit_markdown ({len(result.markdown.fit_markdown)} chars)"
+                    markdown_content = result.markdown.fit_markdown
+                    markdown_type = "fit_markdown"
+                
+                # Fallback to raw_markdown if fit_markdown is empty
+                elif (hasattr(result, 'markdown') and 
+                      hasattr(result.markdown, 'raw_markdown') and 
+                      result.markdown.raw_markdown):
                     
-                    # Save markdown content to file
-                    with open(out_path, "w", encoding="utf-8") as f:
-                        f.write(markdown_content)
-                    print(f"[SUCCESS] Saved to: {out_path}")
+                    info = f"[INFO] Using raw_markdown ({len(result.markdown.raw_markdown)} chars)"
+                    markdown_content = result.markdown.raw_markdown
+                    markdown_type = "raw_markdown"
+                
+                else:
+                    record["error"] = "No markdown content generated"
+                    print(f"\n[SCRAPE] {url}")
+                    print(f"[ERROR] {record['error']}")
+                    return record
+                
+                # Hand the markdown to the batch writer and wait for it; the crawl
+                # slot is already released, so the next page loads meanwhile
+                written = loop.create_future()
+                write_queue.put_nowait((written, out_path, markdown_content))
+                error, signature = await written
+                print(f"\n[SCRAPE] {url}")
+                if error:
+                    record["error"] = f"Failed to write {out_path}: {error}"
+                    print(f"[ERROR] {record['error']}")
+                    return record
+                print(info)
+                print(f"[SUCCESS] Saved to: {out_path}")
                 
+                _mark_saved(record, out_path, markdown_type, len(markdown_content), make_preview(markdown_content))
+                digest = hashlib.sha1(markdown_content.encode("utf-8", errors="replace")).hexdigest()
+                
+                # Remember the page (and its validators, if any) for the next run
+                headers = {k.lower(): v for k, v in (getattr(result, "response_headers", None) or {}).items()}
+                new_entries[key] = {
+                    "etag": headers.get("etag"),
+                    "last_modified": headers.get("last-modified"),
+                    "path": out_path,
+                    "markdown_type": markdown_type,
+                    "content_length": len(markdown_content),
+                    "digest": digest,
+                    "signature": list(signature),
+                    "stored_at": time.time()
+                }
+            
+            except Exception as e:
+                record["error"] = f"Exception while processing {url}: {str(e)}"
+                print(f"\n[SCRAPE] {url}")
+                print(f"[ERROR] {record['error']}")
+            
+            return record
+        
+        async def _writer():
+            # Drain whatever has queued up and write it in one executor call, so
+            # a batch of N pages costs one thread hand-off instead of N
+            while True:
+                batch = [await write_queue.get()]
+                while not write_queue.empty() and len(batch) < WRITE_BATCH_SIZE:
+                    batch.append(write_queue.get_nowait())
+                # Even a failed write may have truncated the file
+                written_paths.update(path for _, path, _ in batch)
+                try:
+                    outcomes = await loop.run_in_executor(
+                        None, write_markdown_files, [(path, content) for _, path, content in batch])
                 except Exception as e:
-                    print(f"[ERROR] Exception while processing {url}: {str(e)}")
-                    
-            # Clean up session when done
+                    outcomes = [(str(e), None)] * len(batch)
+                # Each page is only reported once its file is written (or failed)
+                for (written, _, _), outcome in zip(batch, outcomes):
+                    if not written.done():
+                        written.set_result(outcome)
+                for _ in batch:
+                    write_queue.task_done()
+        
+        async def _scrape_and_report(crawler: AsyncWebCrawler, url: str) -> Dict[str, Any]:
+            record = await _scrape_one(crawler, url)
+            if on_result is not None:
+                on_result(record)
+            return record
+        
+        async def _scrape_all(crawler: AsyncWebCrawler) -> List[Dict[str, Any]]:
+            # Start same-host URLs back to back so the browser can reuse its
+            # keep-alive connections; results are put back in input order
+            order = sorted(range(len(urls)), key=lambda i: _parse_url(urls[i]).netloc)
+            writer = asyncio.create_task(_writer())
             try:
-                await crawler.kill_session(session_id)
-            except:
-                pass
+                host_ordered = await asyncio.gather(*[_scrape_and_report(crawler, urls[i]) for i in order])
+                await write_queue.join()
+            finally:
+                writer.cancel()
+            if cache_updates is not None:
+                cache_updates.update(entries=new_entries, written_paths=written_paths)
+            else:
+                save_cache_index(new_entries, written_paths)
+            
+            results = [None] * len(urls)
+            for i, record in zip(order, host_ordered):
+                results[i] = record
+            
+            # Clean up sessions when done
+            for session_id in session_ids:
+                try:
+                    await crawler.kill_session(session_id)
+                except:
+                    pass
+            return results
+        
+        # Use a single browser for all URLs, with a small pool of sessions (tabs)
+        # so up to max_concurrent pages are crawled at the same time. The batch id
+        # keeps session names apart when several batches share one crawler.
+        loop = asyncio.get_running_loop()
+        settings_key = (pruning_threshold, pruning_type, min_word_threshold,
+                        bool(use_query and query), query if use_query else None, query_threshold,
+                        java_script_enabled)
+        cache_index = load_cache_index() if cache_ttl > 0 and not force_rescrape else {}
+        new_entries = {}
+        written_paths = set()
+        write_queue = asyncio.Queue()
+        
+        # One makedirs per domain before crawling, instead of a check per page
+        folders = prepare_domain_folders(urls)
+        
+        max_concurrent = max(1, max_concurrent)
+        sem = asyncio.Semaphore(max_concurrent)
+        batch_id = uuid.uuid4().hex[:8]
+        session_ids = [f"batch_{batch_id}_{i}" for i in range(min(len(urls), max_concurrent))]
+        idle_sessions = asyncio.Queue()
+        for session_id in session_ids:
+            idle_sessions.put_nowait(session_id)
+        
+        if crawler is not None:
+            return await _scrape_all(crawler)
+        browser_config = build_browser_config(text_mode=text_mode, java_script_enabled=java_script_enabled)
+        async with AsyncWebCrawler(config=browser_config) as crawler:
+            return await _scrape_all(crawler)
                 
     except Exception as e:
         print(f"[ERROR] Crawler initialization failed: {str(e)}")
+        error = f"Crawler initialization failed: {str(e)}"
+        return [new_result(url, error=error) for url in urls]
+
+async def scrape_url(url: str, **options) -> Dict[str, Any]:
+    """Scrape a single URL; takes the same options as scrape_urls and returns its record."""
+    return (await scrape_urls([url], **options))[0]
+
+def _scrape_shard(job):
+    """
+    Worker process entry point: scrape one shard of URLs with its own browser.
+    Returns the records plus the shard's cache updates, which the parent saves.
+    """
+    shard, options = job
+    cache_updates = {"entries": {}, "written_paths": set()}
+    records = asyncio.run(scrape_urls(shard, cache_updates=cache_updates, **options))
+    return records, cache_updates["entries"], cache_updates["written_paths"]
+
+def scrape_urls_in_processes(urls: List[str], workers: int, **options) -> List[Dict[str, Any]]:
+    """
+    Split the URLs across worker processes, each running scrape_urls with its
+    own browser, so markdown generation (CPU-bound, GIL-held) uses several
+    cores. Results are returned in input order.
+    
+    Shards are cut from the URLs grouped by host, so each host's pages stay
+    on as few workers (and keep-alive connections) as possible while the
+    shards remain about the same size. URLs that map to the same output file
+    always go to the same worker, so two processes never write one file.
+    The workers' cache entries are merged and saved once, here.
+    """
+    workers = max(1, min(workers, len(urls)))
+    out_keys = [(_parse_url(url).netloc.replace(":", "_"), url_to_filename(url)) for url in urls]
+    order = sorted(range(len(urls)), key=out_keys.__getitem__)
+    shard_size = -(-len(urls) // workers)  # ceil
+    shard_indices = [[]]
+    for i in order:
+        current = shard_indices[-1]
+        if len(current) >= shard_size and out_keys[i] != out_keys[current[-1]]:
+            shard_indices.append([i])
+        else:
+            current.append(i)
+    
+    # "spawn" gives every worker a clean interpreter (and is the only option on Windows)
+    with multiprocessing.get_context("spawn").Pool(len(shard_indices)) as pool:
+        shard_results = pool.map(
+            _scrape_shard, [([urls[i] for i in indices], options) for indices in shard_indices]
+        )
+    
+    # Save the index once, so workers can't overwrite each other's entries
+    results = [None] * len(urls)
+    new_entries = {}
+    written_paths = set()
+    for indices, (shard_result, entries, paths) in zip(shard_indices, shard_results):
+        for i, record in zip(indices, shard_result):
+            results[i] = record
+        new_entries.update(entries)
+        written_paths.update(paths)
+    save_cache_index(new_entries, written_paths)
+    return results
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Scrape specific URLs with Crawl4AI')
@@ -187,6 +637,26 @@ def parse_arguments():
     parser.add_argument('--query', help='Query for BM25 filtering')
     parser.add_argument('--query-threshold', type=float, default=1.2, help='BM25 threshold')
     
+    # URL selection
+    parser.add_argument('--include', action='append', metavar='REGEX',
+                        help='Only scrape URLs matching this regex (can be repeated)')
+    parser.add_argument('--exclude', action='append', metavar='REGEX',
+                        help='Skip URLs matching this regex (can be repeated)')
+    
+    # Performance
+    parser.add_argument('--max-concurrent', type=int, default=MAX_CONCURRENT,
+                        help='Number of pages to crawl in parallel')
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help='Number of worker processes (each with its own browser)')
+    parser.add_argument('--cache-ttl', type=int, default=CACHE_TTL,
+                        help='Seconds during which unchanged pages are reused instead of crawled (0 disables)')
+    parser.add_argument('--force-rescrape', action='store_true',
+                        help='Crawl every page again even if a fresh copy is cached')
+    parser.add_argument('--load-images', action='store_false', dest='text_mode', default=TEXT_MODE,
+                        help='Let the browser download images, fonts and media')
+    parser.add_argument('--no-javascript', action='store_false', dest='java_script_enabled',
+                        default=JAVASCRIPT_ENABLED, help='Disable JavaScript (faster on static sites)')
+    
     return parser.parse_args()
 
 async def main():
@@ -199,28 +669,55 @@ async def main():
             urls = [args.url]
         elif args.file and os.path.exists(args.file):
             with open(args.file, 'r', encoding='utf-8') as f:
-                urls = [line.strip() for line in f.readlines() if line.strip()]
+                # One bulk read; URLs contain no whitespace, so split() drops blank lines too
+                urls = f.read().split()
         else:
             urls = URLS_TO_SCRAPE
         
+        # Skip duplicates and unwanted URLs before launching any crawl
+        total = len(urls)
+        urls = filter_urls(urls, include=args.include, exclude=args.exclude)
+        if len(urls) < total:
+            print(f"[INFO] Skipping {total - len(urls)} duplicate or filtered URLs")
+        
         if not urls:
             print("[ERROR] No URLs provided. Use --url, --file, or add URLs to URLS_TO_SCRAPE in the script.")
             return
         
-        await scrape_urls(
-            urls=urls,
+        options = dict(
             pruning_threshold=args.pruning_threshold,
             pruning_type=args.pruning_type,
             min_word_threshold=args.min_word_threshold,
             use_query=args.use_query,
             query=args.query,
-            query_threshold=args.query_threshold
+            query_threshold=args.query_threshold,
+            max_concurrent=args.max_concurrent,
+            text_mode=args.text_mode,
+            java_script_enabled=args.java_script_enabled,
+            cache_ttl=args.cache_ttl,
+            force_rescrape=args.force_rescrape
         )
+        
+        if args.workers > 1 and len(urls) > 1:
+            # The worker pool blocks, so keep it off the event loop
+            await asyncio.get_running_loop().run_in_executor(
+                None, partial(scrape_urls_in_processes, urls, args.workers, **options)
+            )
+        else:
+            await scrape_urls(urls=urls, **options)
     
     except Exception as e:
         print(f"[CRITICAL ERROR] {str(e)}")
         
 if __name__ == "__main__":
+    # uvloop, when installed, gives a faster event loop for the crawl's many
+    # sockets; only set here so importers (the UI) keep their own loop choice
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -1,16 +1,61 @@
 import streamlit as st
+import asyncio
+import json
 import os
-import re
 import sys
+import threading
 import time
+import numpy as np
 import pandas as pd
 import subprocess
-from pathlib import Path
+from functools import lru_cache
 from urllib.parse import urlparse
 from typing import List, Dict, Any, Optional, Union
 import requests
-from xml.etree import ElementTree
-import tempfile
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from crawl4ai import AsyncWebCrawler
+from scrape_specific_urls import scrape_urls, scrape_url, build_browser_config, new_result, read_preview, CACHE_TTL, MAX_CONCURRENT
+
+# Prefer lxml's C parser for sitemaps, fall back to the standard library
+try:
+    from lxml import etree as ElementTree
+    HAS_LXML = True
+except ImportError:
+    from xml.etree import ElementTree
+    HAS_LXML = False
+
+# Number of sub-sitemaps of a sitemap index downloaded in parallel
+SITEMAP_FETCH_WORKERS = 16
+
+# Bytes read from a sitemap candidate to decide whether it is a sitemap at all
+SITEMAP_SNIFF_BYTES = 512
+
+# Seconds between progress bar updates while a batch is being scraped
+PROGRESS_POLL_SECONDS = 0.25
+
+# Bytes fed to the sitemap parser at a time
+SITEMAP_READ_CHUNK = 64 * 1024
+
+# Crawler settings read back from session_state, where each widget of
+# render_crawler_settings stores its value under the setting's name
+SETTING_KEYS = ("pruning_threshold", "pruning_type", "min_word_threshold", "process_iframes",
+                "remove_overlays", "escape_html", "ignore_links", "use_query",
+                "cache_ttl", "force_rescrape", "max_concurrent")
+DEEP_CRAWL_SETTING_KEYS = ("max_depth", "max_pages", "include_external", "try_sitemap")
+
+# Shared keep-alive HTTP session for sitemap discovery, so repeated probes of
+# the same site reuse one TCP/TLS connection
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=SITEMAP_FETCH_WORKERS,
+    pool_maxsize=SITEMAP_FETCH_WORKERS,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.headers.update({"User-Agent": "sitemap-probe/1.0"})
 
 # Set page configuration
 st.set_page_config(
@@ -93,29 +138,17 @@ st.markdown("""
         background-color: #2980b9;
         box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
     }
-    .metrics-container {
-        display: flex;
-        justify-content: space-between;
-        gap: 1rem;
-    }
-    .metric-card {
+    [data-testid="stMetric"] {
         background-color: #ffffff;
         border-radius: 0.5rem;
         padding: 1rem;
         box-shadow: 0 2px 4px rgba(0, 0, 0, 0.05);
         text-align: center;
-        flex: 1;
     }
-    .metric-value {
-        font-size: 1.8rem;
+    [data-testid="stMetricValue"] {
         font-weight: 700;
         color: #3498db;
     }
-    .metric-label {
-        font-size: 0.9rem;
-        color: #7f8c8d;
-        margin-top: 0.25rem;
-    }
     footer {
         margin-top: 3rem;
         text-align: center;
@@ -136,25 +169,126 @@ st.markdown("""
 # HELPER FUNCTIONS
 # ========================
 
-def get_domain_folder(url: str) -> str:
-    """Get or create a domain-specific folder for storing scraped content using relative paths."""
-    parsed = urlparse(url)
-    domain = parsed.netloc.replace(":", "_")
-    # Use relative path based on the script's location
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    folder = os.path.join(script_dir, domain)
-    os.makedirs(folder, exist_ok=True)
-    return folder
+class LocTarget:
+    """
+    Parser target that only keeps the <loc> text of <sitemap> and <url>
+    entries, so no element tree is built while a sitemap is parsed.
+    """
+    
+    def __init__(self):
+        self.entries = []
+        self._depth = 0
+        self._kind = None
+        self._kind_depth = 0
+        self._in_loc = False
+        self._buf = []
+    
+    def start(self, tag, attrib):
+        self._depth += 1
+        name = tag.rsplit("}", 1)[-1]
+        if name in ("sitemap", "url"):
+            self._kind, self._kind_depth = name, self._depth
+        elif name == "loc" and self._kind and self._depth == self._kind_depth + 1:
+            # Only the entry's own <loc>, not e.g. <image:loc> nested deeper
+            self._in_loc = True
+    
+    def data(self, data):
+        if self._in_loc:
+            self._buf.append(data)
+    
+    def end(self, tag):
+        if self._in_loc:
+            loc = "".join(self._buf).strip()
+            if loc:
+                self.entries.append((self._kind, loc))
+            self._buf.clear()
+            self._in_loc = False
+        elif self._kind and self._depth == self._kind_depth:
+            self._kind = None
+        self._depth -= 1
+    
+    def close(self):
+        return self.entries
+
+def iter_sitemap_entries(source):
+    """
+    Stream a sitemap and yield (kind, loc) pairs, where kind is "sitemap" for
+    the entries of a sitemap index and "url" for pages. The parser only fires
+    callbacks and is fed in chunks, so memory stays flat whatever the size.
+    """
+    target = LocTarget()
+    if HAS_LXML:
+        parser = ElementTree.XMLParser(target=target, recover=True, huge_tree=True)
+    else:
+        parser = ElementTree.XMLParser(target=target)
+    
+    while True:
+        chunk = source.read(SITEMAP_READ_CHUNK)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        entries, target.entries = target.entries, []
+        yield from entries
+    parser.close()
+    yield from target.entries
 
-def url_to_filename(url: str) -> str:
-    """Convert URL to a valid filename."""
-    parsed = urlparse(url)
-    path = parsed.path.strip("/").replace("/", "_")
-    if not path:
-        path = "index"
-    # Remove query/fragment and other invalid characters
-    path = re.sub(r'[^a-zA-Z0-9_\-]', '', path)
-    return path + ".md"
+class PrefixedStream:
+    """File-like object that replays already-read bytes before the rest of a stream."""
+    
+    def __init__(self, head: bytes, stream):
+        self._head = head
+        self._stream = stream
+    
+    def read(self, size: int = -1) -> bytes:
+        if not self._head:
+            return self._stream.read(size)
+        if size is None or size < 0:
+            data, self._head = self._head + self._stream.read(), b""
+        else:
+            data, self._head = self._head[:size], self._head[size:]
+        return data
+
+def open_sitemap_stream(resp):
+    """Return a file-like object to stream an XML sitemap response from."""
+    resp.raw.decode_content = True  # Transparently handle gzip/deflate
+    return resp.raw
+
+def sitemap_may_exist(sitemap_url: str) -> bool:
+    """Cheap HEAD probe so missing sitemap candidates are skipped without downloading a body."""
+    try:
+        resp = _SESSION.head(sitemap_url, allow_redirects=True, timeout=5)
+    except requests.RequestException:
+        return True  # Let the GET decide
+    # Some servers reject HEAD (405) but serve GET fine, so only trust "not found"
+    return resp.status_code not in (404, 410)
+
+def fetch_sub_sitemap(sitemap_url: str):
+    """Fetch one sub-sitemap of an index. Returns (page URLs, error message or None)."""
+    page_urls = []
+    try:
+        with _SESSION.get(sitemap_url, timeout=10, stream=True) as resp:
+            if resp.status_code == 200:
+                for kind, loc in iter_sitemap_entries(open_sitemap_stream(resp)):
+                    if kind == "url":
+                        page_urls.append(loc)
+    except Exception as e:
+        return page_urls, str(e)
+    return page_urls, None
+
+def sitemaps_from_robots(root: str) -> List[str]:
+    """Return the sitemap URLs advertised by "Sitemap:" lines in the site's robots.txt."""
+    try:
+        resp = _SESSION.get(f"{root}/robots.txt", timeout=5)
+        if resp.status_code != 200:
+            return []
+    except requests.RequestException:
+        return []
+    
+    return [
+        line.split(":", 1)[1].strip()
+        for line in resp.text.splitlines()
+        if line.strip().lower().startswith("sitemap:") and line.split(":", 1)[1].strip()
+    ]
 
 def fetch_sitemap_urls(base_url: str):
     """
@@ -181,58 +315,71 @@ def fetch_sitemap_urls(base_url: str):
     with st.spinner("Searching for sitemap..."):
         progress_text = st.empty()
         
-        for sitemap_path in sitemap_locations:
-            sitemap_url = f"{root}{sitemap_path}"
+        # Sitemaps declared in robots.txt are authoritative: try them first and
+        # only fall back to the common locations if they give nothing. The
+        # common locations are probed while robots.txt is still downloading,
+        # all over the shared connection pool.
+        progress_text.text(f"Checking {root}/robots.txt and common sitemap locations")
+        guessed = [f"{root}{path}" for path in sitemap_locations]
+        with ThreadPoolExecutor(max_workers=SITEMAP_FETCH_WORKERS) as executor:
+            robots_future = executor.submit(sitemaps_from_robots, root)
+            guessed_probes = executor.map(sitemap_may_exist, guessed)
+            declared = [url for url in dict.fromkeys(robots_future.result()) if url not in guessed]
+            may_exist = dict(zip(declared, executor.map(sitemap_may_exist, declared)))
+            may_exist.update(zip(guessed, guessed_probes))
+        candidates = list(dict.fromkeys(robots_future.result() + guessed))
+        
+        for sitemap_url in candidates:
+            if not may_exist[sitemap_url]:
+                continue
             progress_text.text(f"Checking {sitemap_url}")
             
             try:
-                resp = requests.get(sitemap_url, timeout=10)
-                if resp.status_code != 200:
-                    continue
-                
-                found_sitemap = sitemap_url
-                content_type = resp.headers.get('Content-Type', '')
-                text = resp.text
-                
-                # Handle XML sitemaps
-                if 'xml' in content_type or text.strip().startswith('<?xml'):
-                    try:
-                        root_element = ElementTree.fromstring(resp.content)
-                        
-                        # Check if this is a sitemap index
-                        sitemap_tags = root_element.findall('.//{*}sitemap')
-                        if sitemap_tags:
-                            progress_text.text(f"Found sitemap index with {len(sitemap_tags)} sitemaps")
-                            for sitemap in sitemap_tags:
-                                loc = sitemap.find('.//{*}loc')
-                                if loc is not None and loc.text:
-                                    sub_sitemap_url = loc.text.strip()
-                                    progress_text.text(f"Fetching sub-sitemap: {sub_sitemap_url}")
-                                    try:
-                                        sub_resp = requests.get(sub_sitemap_url, timeout=10)
-                                        if sub_resp.status_code == 200:
-                                            sub_root = ElementTree.fromstring(sub_resp.content)
-                                            for url in sub_root.findall('.//{*}url'):
-                                                loc = url.find('.//{*}loc')
-                                                if loc is not None and loc.text:
-                                                    found_urls.add(loc.text.strip())
-                                    except Exception as e:
-                                        st.warning(f"Failed to parse sub-sitemap: {e}")
-                        
-                        # Find individual URLs
-                        for loc in root_element.findall('.//{*}loc'):
-                            if loc.text:
-                                found_urls.add(loc.text.strip())
-                    except Exception as e:
-                        st.warning(f"XML parsing error: {e}")
+                with _SESSION.get(sitemap_url, timeout=10, stream=True) as resp:
+                    if resp.status_code != 200:
                         continue
-                
-                # Handle text sitemaps
-                elif 'text/plain' in content_type or sitemap_url.endswith('.txt'):
-                    for line in text.splitlines():
-                        line = line.strip()
-                        if line.startswith('http'):
-                            found_urls.add(line)
+                    
+                    # Sniff the first bytes to tell XML and text sitemaps from
+                    # error pages, without downloading the whole body on a miss
+                    stream = open_sitemap_stream(resp)
+                    head = stream.read(SITEMAP_SNIFF_BYTES)
+                    is_xml = any(marker in head for marker in (b'<?xml', b'<sitemapindex', b'<urlset'))
+                    is_text = not is_xml and head.lstrip().startswith(b'http')
+                    if not (is_xml or is_text):
+                        continue
+                    
+                    found_sitemap = sitemap_url
+                    
+                    # Handle XML sitemaps
+                    if is_xml:
+                        try:
+                            sub_sitemap_urls = []
+                            for kind, loc in iter_sitemap_entries(PrefixedStream(head, stream)):
+                                if kind == "url":
+                                    found_urls.add(loc)
+                                # Entries of a sitemap index are sitemaps, not pages
+                                elif kind == "sitemap":
+                                    sub_sitemap_urls.append(loc)
+                        except Exception as e:
+                            st.warning(f"XML parsing error: {e}")
+                            continue
+                        
+                        if sub_sitemap_urls:
+                            progress_text.text(f"Found sitemap index with {len(sub_sitemap_urls)} sitemaps, fetching them...")
+                            # Sub-sitemaps are independent downloads: fetch them in parallel
+                            with ThreadPoolExecutor(max_workers=SITEMAP_FETCH_WORKERS) as executor:
+                                for page_urls, error in executor.map(fetch_sub_sitemap, sub_sitemap_urls):
+                                    if error:
+                                        st.warning(f"Failed to parse sub-sitemap: {error}")
+                                    found_urls.update(page_urls)
+                    
+                    # Handle text sitemaps
+                    else:
+                        text = (head + stream.read()).decode(resp.encoding or 'utf-8', errors='replace')
+                        for line in text.splitlines():
+                            line = line.strip()
+                            if line.startswith('http'):
+                                found_urls.add(line)
                 
                 if found_urls:
                     progress_text.text(f"Found {len(found_urls)} URLs in {sitemap_url}")
@@ -243,6 +390,7 @@ def fetch_sitemap_urls(base_url: str):
                 
     return list(found_urls), found_sitemap
 
+@lru_cache(maxsize=4096)
 def is_valid_url(url):
     """Check if a URL is valid."""
     try:
@@ -251,449 +399,247 @@ def is_valid_url(url):
     except:
         return False
 
+@st.cache_data
+def parse_url_list(text: str):
+    """
+    Return the unique valid URLs of a pasted or uploaded list, the number of
+    non-blank lines and the number of duplicate lines, in a single pass,
+    computed once per distinct text.
+    """
+    urls = []
+    seen = set()
+    total_lines = 0
+    duplicates = 0
+    for line in text.splitlines():
+        url = line.strip()
+        if not url:
+            continue
+        total_lines += 1
+        if url in seen:
+            duplicates += 1
+        elif is_valid_url(url):
+            seen.add(url)
+            urls.append(url)
+    return urls, total_lines, duplicates
+
 
 # ========================
-# SCRAPING FUNCTIONS USING SUBPROCESS
+# SCRAPING FUNCTIONS
 # ========================
 
-def scrape_single_url(url: str, settings: Dict[str, Any]) -> Dict[str, Any]:
-    """Scrape a single URL using subprocess to run the scrape_specific_urls.py script"""
-    result = {
-        "success": False,
-        "error": None,
-        "url": url,
-        "saved_path": None,
-        "markdown_type": None,
-        "content_length": 0,
-        "content_preview": None,
-        "domain": urlparse(url).netloc
+@st.cache_resource
+def start_scrape_worker():
+    """
+    Start the background event loop and browser shared by every scrape.
+    Crawls run in-process on this loop, so crawl4ai and Chromium are loaded
+    once per server instead of once per button press.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="scrape-worker", daemon=True).start()
+    crawler = AsyncWebCrawler(config=build_browser_config())
+    try:
+        asyncio.run_coroutine_threadsafe(crawler.start(), loop).result()
+    except Exception:
+        # Nothing is cached on failure, so don't leave the loop thread behind
+        loop.call_soon_threadsafe(loop.stop)
+        raise
+    return loop, crawler
+
+def get_scrape_worker():
+    """Return the shared worker, starting a new one if the cached one has died."""
+    loop, crawler = start_scrape_worker()
+    if not loop.is_running() or not getattr(crawler, "ready", True):
+        loop.call_soon_threadsafe(loop.stop)
+        start_scrape_worker.clear()
+        loop, crawler = start_scrape_worker()
+    return loop, crawler
+
+def scrape_options(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Map the UI settings to scrape_urls / scrape_url keyword arguments."""
+    return {
+        "pruning_threshold": settings.get("pruning_threshold", 0.35),
+        "pruning_type": settings.get("pruning_type", "dynamic"),
+        "min_word_threshold": settings.get("min_word_threshold", 5),
+        "use_query": settings.get("use_query", False),
+        "query": settings.get("query", ""),
+        "query_threshold": settings.get("query_threshold", 1.2),
+        "cache_ttl": settings.get("cache_ttl", CACHE_TTL),
+        "force_rescrape": settings.get("force_rescrape", False),
+        "max_concurrent": settings.get("max_concurrent", MAX_CONCURRENT)
     }
+
+def show_debug_results(results: List[Dict[str, Any]]):
+    """Print one line per result record when detailed logs are enabled."""
+    if st.session_state.get("detailed_logs", False):
+        for result in results:
+            st.write(f"{result['url']}: success={result['success']}, error={result['error']}, saved_path={result['saved_path']}")
+
+def run_scrape(urls: List[str], settings: Dict[str, Any], progress=None) -> List[Dict[str, Any]]:
+    """
+    Run scrape_urls on the background worker and wait for its results.
+    progress(done, total) is called from this thread as URLs complete.
+    """
+    loop, crawler = get_scrape_worker()
+    finished = []  # Appended to by the worker thread
+    coro = scrape_urls(urls, crawler=crawler, on_result=finished.append, **scrape_options(settings))
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    
+    # Redraw the progress bar about every 5% rather than on every URL
+    step = max(1, len(urls) // 20)
+    reported = 0
+    while True:
+        try:
+            results = future.result(timeout=PROGRESS_POLL_SECONDS)
+            break
+        except FutureTimeoutError:
+            if progress is not None and len(finished) - reported >= step:
+                reported = len(finished)
+                progress(reported, len(urls))
     
+    show_debug_results(results)
+    return results
+
+def scrape_single_url(url: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Scrape a single URL in-process with the shared crawler"""
     try:
-        # Get path to the scrape_specific_urls.py script (in the same directory)
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        script_path = os.path.join(script_dir, "scrape_specific_urls.py")
-        
-        # Calculate expected output path to use as fallback
-        folder = get_domain_folder(url)
-        filename = url_to_filename(url)
-        expected_path = os.path.join(folder, filename)
-        
-        # Build command with all settings
-        cmd = [
-            sys.executable,  # Current Python interpreter
-            script_path,
-            "--url", url,
-            "--pruning-threshold", str(settings.get("pruning_threshold", 0.35)),
-            "--pruning-type", settings.get("pruning_type", "dynamic"),
-            "--min-word-threshold", str(settings.get("min_word_threshold", 5))
-        ]
-        
-        # Add query-based filtering if enabled
-        if settings.get("use_query", False) and settings.get("query", ""):
-            cmd.extend([
-                "--use-query",
-                "--query", settings.get("query", ""),
-                "--query-threshold", str(settings.get("query_threshold", 1.2))
-            ])
-        
-        # Run the command with proper encoding
-        process = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=False,
-            encoding='utf-8'
-        )
-        
-        # More debugging if enabled
-        if st.session_state.get("detailed_logs", False):
-            st.write(f"Command: {' '.join(cmd)}")
-            st.write(f"Exit code: {process.returncode}")
-            st.write(f"Stdout: {process.stdout[:500]}...")
-            st.write(f"Stderr: {process.stderr}")
-        
-        # Check both standard output and standard error
-        output_text = process.stdout + "\n" + process.stderr
-        
-        # Check if successful by examining both exit code and output text
-        if process.returncode == 0 or "[SUCCESS]" in output_text:
-            # Check both methods to find the output path
-            # Method 1: Look for the explicit success message
-            saved_line = [line for line in output_text.splitlines() if "[SUCCESS] Saved to:" in line]
-            output_path = None
-            
-            if saved_line:
-                # Extract path from success message
-                output_path = saved_line[0].split("[SUCCESS] Saved to:")[1].strip()
-            
-            # Method 2: If no success message found, try the expected path
-            if not output_path or not os.path.exists(output_path):
-                output_path = expected_path
-            
-            # Final check for file existence
-            if os.path.exists(output_path):
-                # Get the file content
-                with open(output_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                result["success"] = True
-                result["saved_path"] = output_path
-                result["content_length"] = len(content)
-                result["content_preview"] = content[:500] + "..." if len(content) > 500 else content
-                result["markdown_type"] = "fit_markdown"
-            else:
-                # Look for clues in the output for why the file wasn't created
-                info_lines = [line for line in output_text.splitlines() if "[INFO]" in line]
-                error_lines = [line for line in output_text.splitlines() if "[ERROR]" in line]
-                
-                # Check if it found content but failed to save
-                content_found = any("Found fit_markdown" in line for line in info_lines)
-                
-                if content_found:
-                    result["error"] = "Content was extracted but file wasn't saved properly"
-                elif error_lines:
-                    result["error"] = error_lines[0].replace("[ERROR]", "").strip()
-                else:
-                    result["error"] = "File was not saved and no error was reported"
-        else:
-            # Extract error from stderr or stdout if any
-            error_lines = [line for line in output_text.splitlines() if "[ERROR]" in line]
-            if error_lines:
-                result["error"] = error_lines[0].replace("[ERROR]", "").strip()
-            else:
-                result["error"] = process.stderr or "Unknown error during scraping"
-        
+        loop, crawler = get_scrape_worker()
+        coro = scrape_url(url, crawler=crawler, **scrape_options(settings))
+        result = asyncio.run_coroutine_threadsafe(coro, loop).result()
+        show_debug_results([result])
+        return result
     except Exception as e:
-        result["error"] = str(e)
-    
-    return result
+        return new_result(url, error=str(e))
 
-def scrape_multiple_urls(urls: List[str], settings: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Scrape multiple URLs using subprocess to run the scrape_specific_urls.py script"""
-    results = []
-    
-    # Create a temporary file with all URLs
-    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as temp:
-        temp_path = temp.name
-        for url in urls:
-            temp.write(f"{url}\n")
-    
+def scrape_multiple_urls(urls: List[str], settings: Dict[str, Any], progress=None) -> List[Dict[str, Any]]:
+    """Scrape multiple URLs in-process with the shared crawler, reporting progress(done, total)"""
+    urls = list(dict.fromkeys(urls))  # Drop duplicates, keeping the first occurrence
     try:
-        # Get path to the scrape_specific_urls.py script
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        script_path = os.path.join(script_dir, "scrape_specific_urls.py")
-        
-        # Build command with all settings
-        cmd = [
-            sys.executable,  # Current Python interpreter
-            script_path,
-            "--file", temp_path,
-            "--pruning-threshold", str(settings.get("pruning_threshold", 0.35)),
-            "--pruning-type", settings.get("pruning_type", "dynamic"),
-            "--min-word-threshold", str(settings.get("min_word_threshold", 5))
-        ]
-        
-        # Add query-based filtering if enabled
-        if settings.get("use_query", False) and settings.get("query", ""):
-            cmd.extend([
-                "--use-query",
-                "--query", settings.get("query", ""),
-                "--query-threshold", str(settings.get("query_threshold", 1.2))
-            ])
-        
-        # Run the command with proper encoding
-        process = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=False,
-            encoding='utf-8'
-        )
-        
-        # More debugging if enabled
-        if st.session_state.get("detailed_logs", False):
-            st.write(f"Command: {' '.join(cmd)}")
-            st.write(f"Exit code: {process.returncode}")
-            st.write(f"Stdout (first 500 chars): {process.stdout[:500]}...")
-            if process.stderr:
-                st.write(f"Stderr: {process.stderr}")
-        
-        # Combine stdout and stderr for parsing
-        output_text = process.stdout + "\n" + process.stderr
-        output_lines = output_text.splitlines()
-        
-        # Track URLs being processed
-        url_status_map = {url: {
-            "success": False,
-            "error": None,
-            "url": url,
-            "saved_path": None, 
-            "markdown_type": None,
-            "content_length": 0,
-            "content_preview": None,
-            "domain": urlparse(url).netloc
-        } for url in urls}
-        
-        current_url = None
-        
-        # Parse the output line by line
-        for line in output_lines:
-            if line.startswith("[SCRAPE]"):
-                # New URL being processed
-                url = line.replace("[SCRAPE]", "").strip()
-                current_url = url if url in url_status_map else None
-            
-            elif line.startswith("[SUCCESS]") and "Saved to:" in line and current_url:
-                # File was saved successfully
-                output_path = line.split("[SUCCESS] Saved to:")[1].strip()
-                
-                if os.path.exists(output_path):
-                    # Get the file content
-                    try:
-                        with open(output_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        
-                        url_status_map[current_url]["success"] = True
-                        url_status_map[current_url]["saved_path"] = output_path
-                        url_status_map[current_url]["content_length"] = len(content)
-                        url_status_map[current_url]["content_preview"] = content[:500] + "..." if len(content) > 500 else content
-                        url_status_map[current_url]["markdown_type"] = "fit_markdown"
-                    except Exception as e:
-                        url_status_map[current_url]["error"] = f"Error reading file: {str(e)}"
-                else:
-                    # For cases where the path was reported but file not found
-                    folder = get_domain_folder(current_url)
-                    filename = url_to_filename(current_url)
-                    expected_path = os.path.join(folder, filename)
-                    
-                    if os.path.exists(expected_path):
-                        try:
-                            with open(expected_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                            
-                            url_status_map[current_url]["success"] = True
-                            url_status_map[current_url]["saved_path"] = expected_path
-                            url_status_map[current_url]["content_length"] = len(content)
-                            url_status_map[current_url]["content_preview"] = content[:500] + "..." if len(content) > 500 else content
-                            url_status_map[current_url]["markdown_type"] = "fit_markdown"
-                        except Exception as e:
-                            url_status_map[current_url]["error"] = f"Error reading file: {str(e)}"
-                    else:
-                        url_status_map[current_url]["error"] = "Reported path not found"
-            
-            elif line.startswith("[ERROR]") and current_url:
-                # Error processing URL
-                error_msg = line.replace("[ERROR]", "").strip()
-                if current_url in url_status_map:
-                    url_status_map[current_url]["error"] = error_msg
-        
-        # Convert map to list of results
-        results = list(url_status_map.values())
-        
-        # Fall back to checking by expected path for any URLs not found in output
-        for result in results:
-            if not result["success"] and not result["saved_path"]:
-                url = result["url"]
-                folder = get_domain_folder(url)
-                filename = url_to_filename(url)
-                expected_path = os.path.join(folder, filename)
-                
-                if os.path.exists(expected_path):
-                    try:
-                        with open(expected_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        
-                        result["success"] = True
-                        result["saved_path"] = expected_path
-                        result["content_length"] = len(content)
-                        result["content_preview"] = content[:500] + "..." if len(content) > 500 else content
-                        result["markdown_type"] = "fit_markdown"
-                        result["error"] = None
-                    except Exception as e:
-                        result["error"] = f"Error reading file: {str(e)}"
-        
+        return run_scrape(urls, settings, progress)
     except Exception as e:
         # Add error result for each URL
-        for url in urls:
-            results.append({
-                "success": False,
-                "error": str(e),
-                "url": url,
-                "saved_path": None,
-                "markdown_type": None,
-                "content_length": 0,
-                "content_preview": None,
-                "domain": urlparse(url).netloc
-            })
-    
-    finally:
-        # Clean up temp file
-        if os.path.exists(temp_path):
-            try:
-                os.unlink(temp_path)
-            except:
-                pass
-    
-    return results
+        return [new_result(url, error=str(e)) for url in urls]
 
 def deep_crawl_website(base_url: str, settings: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Perform a deep crawl of a website using subprocess to run the website_scraper.py script"""
     results = []
+    base = urlparse(base_url)
     
     try:
         # Get path to the website_scraper.py script
         script_dir = os.path.dirname(os.path.abspath(__file__))
         script_path = os.path.join(script_dir, "website_scraper.py")
         
-        # Create a temporary config file to override settings
-        temp_config = f"""
-# =====================
-# CONFIGURATION SECTION
-# =====================
-
-# --- User Parameters ---
-CRAWL_MODE = "deep"  # "single" or "deep"
-TARGET_URL = "{base_url}"
-# For deep crawl only:
-MAX_DEPTH = {settings.get("deep_crawl_settings", {}).get("max_depth", 2)}
-MAX_PAGES = {settings.get("deep_crawl_settings", {}).get("max_pages", 20)}
-INCLUDE_EXTERNAL = {str(settings.get("deep_crawl_settings", {}).get("include_external", False))}
-
-# Pruning filter parameters
-PRUNING_THRESHOLD = {settings.get("pruning_threshold", 0.35)}  # 0.0 (keep more) to 1.0 (prune more)
-PRUNING_TYPE = "{settings.get("pruning_type", "dynamic")}"  # "fixed" or "dynamic"
-MIN_WORD_THRESHOLD = {settings.get("min_word_threshold", 5)}
-
-# =====================
-"""
-        # Write to temp file
-        with tempfile.NamedTemporaryFile('w', suffix='.py', delete=False) as temp:
-            temp_config_path = temp.name
-            temp.write(temp_config)
-        
-        # Setup environment variables to override config
+        # Pass the settings through the environment (see website_scraper.py's
+        # configuration section). The UI has already looked for a sitemap.
+        deep_settings = settings.get("deep_crawl_settings", {})
         env = os.environ.copy()
-        env["PYTHONPATH"] = script_dir + os.pathsep + env.get("PYTHONPATH", "")
+        env.update({
+            "WS_CRAWL_MODE": "deep",
+            "WS_TARGET_URL": base_url,
+            "WS_TRY_SITEMAP": "0",
+            "WS_MAX_DEPTH": str(deep_settings.get("max_depth", 2)),
+            "WS_MAX_PAGES": str(deep_settings.get("max_pages", 20)),
+            "WS_INCLUDE_EXTERNAL": "1" if deep_settings.get("include_external", False) else "0",
+            "WS_PRUNING_THRESHOLD": str(settings.get("pruning_threshold", 0.35)),
+            "WS_PRUNING_TYPE": settings.get("pruning_type", "dynamic"),
+            "WS_MIN_WORD_THRESHOLD": str(settings.get("min_word_threshold", 5))
+        })
         
-        # Run the script with the temp config
-        process = subprocess.run(
-            [sys.executable, script_path],
-            capture_output=True,
+        # Run the script and read its output while it crawls, instead of
+        # buffering everything until it exits. stdin is closed so it can
+        # never wait on a prompt.
+        process = subprocess.Popen(
+            [sys.executable, script_path, "--machine-readable"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True,
-            check=False,
+            errors="replace",
+            bufsize=1,
             env=env
         )
         
         # Process the output to gather results
-        output_lines = process.stdout.splitlines()
         current_url = None
         domain_folder = None
+        seen_urls = set()  # Report each page once even if it shows up twice
+        status = st.empty()
         
-        for line in output_lines:
-            if "[OK]" in line and "->" in line:
-                # Extract URL and file path
-                parts = line.split("[OK]")[1].strip().split("->")
-                if len(parts) == 2:
-                    url = parts[0].strip()
-                    output_path = parts[1].strip()
-                    
-                    if os.path.exists(output_path):
-                        # Get the file content
-                        with open(output_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        
-                        results.append({
-                            "success": True,
-                            "error": None,
-                            "url": url,
-                            "saved_path": output_path,
-                            "content_length": len(content),
-                            "content_preview": content[:500] + "..." if len(content) > 500 else content,
-                            "markdown_type": "fit_markdown",
-                            "domain": urlparse(url).netloc
-                        })
+        for line in process.stdout:
+            # The child prints one JSON object per page; everything else is
+            # crawler logging
+            if not line.startswith("{"):
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
             
-            elif "[DONE] Crawled" in line and "pages" in line:
-                # Get the domain folder
-                folder_match = re.search(r"saved in: (.+)", line)
-                if folder_match:
-                    domain_folder = folder_match.group(1)
+            if record.get("event") == "done":
+                domain_folder = record.get("folder")
+                continue
             
-            elif "[ERROR]" in line and ":" in line:
-                # Error processing URL
-                parts = line.split("[ERROR]")[1].strip().split(":", 1)
-                if len(parts) == 2:
-                    url = parts[0].strip()
-                    error = parts[1].strip()
-                    
-                    results.append({
-                        "success": False,
-                        "error": error,
-                        "url": url,
-                        "saved_path": None,
-                        "markdown_type": None,
-                        "content_length": 0,
-                        "content_preview": None,
-                        "domain": urlparse(url).netloc
-                    })
+            url = record.get("url")
+            if record.get("event") != "page" or not url or url in seen_urls:
+                continue
+            status.text(f"Crawled: {url}")
+            
+            if record["ok"]:
+                output_path = record["path"]
+                if os.path.exists(output_path):
+                    seen_urls.add(url)
+                    # Length and preview come with the record, no need to read the file back
+                    results.append(new_result(
+                        url, success=True, saved_path=output_path, markdown_type="fit_markdown",
+                        content_length=record.get("content_length", 0),
+                        content_preview=record.get("content_preview")
+                    ))
+            else:
+                seen_urls.add(url)
+                results.append(new_result(url, error=record.get("error")))
+        
+        process.wait()
+        status.empty()
         
         # If no results were processed from output but domain folder was found,
         # check for any markdown files in the domain folder
         if not results and domain_folder and os.path.exists(domain_folder):
-            for file in os.listdir(domain_folder):
-                if file.endswith(".md"):
-                    filepath = os.path.join(domain_folder, file)
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        content = f.read()
+            with os.scandir(domain_folder) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".md") or not entry.is_file():
+                        continue
                     
                     # Reconstruct URL from filename (approximate)
-                    filename = os.path.splitext(file)[0]
+                    filename = os.path.splitext(entry.name)[0]
                     path = filename.replace("_", "/")
                     if path == "index":
                         path = ""
-                    reconstructed_url = f"{urlparse(base_url).scheme}://{urlparse(base_url).netloc}/{path}"
+                    reconstructed_url = f"{base.scheme}://{base.netloc}/{path}"
+                    if reconstructed_url in seen_urls:
+                        continue
+                    seen_urls.add(reconstructed_url)
+                    
+                    # Only the start of the file is read, for the preview
+                    content_length, content_preview = read_preview(entry.path)
                     
-                    results.append({
-                        "success": True,
-                        "error": None,
-                        "url": reconstructed_url,
-                        "saved_path": filepath,
-                        "content_length": len(content),
-                        "content_preview": content[:500] + "..." if len(content) > 500 else content,
-                        "markdown_type": "fit_markdown",
-                        "domain": urlparse(base_url).netloc
-                    })
+                    results.append(new_result(
+                        reconstructed_url, success=True, saved_path=entry.path, markdown_type="fit_markdown",
+                        content_length=content_length, content_preview=content_preview
+                    ))
         
         # If still no results, add an error result
         if not results:
-            results.append({
-                "success": False,
-                "error": "No pages were successfully crawled" if process.returncode != 0 else "No output from crawler",
-                "url": base_url,
-                "saved_path": None,
-                "markdown_type": None,
-                "content_length": 0,
-                "content_preview": None,
-                "domain": urlparse(base_url).netloc
-            })
+            error = "No pages were successfully crawled" if process.returncode != 0 else "No output from crawler"
+            results.append(new_result(base_url, error=error))
         
     except Exception as e:
-        results.append({
-            "success": False,
-            "error": str(e),
-            "url": base_url,
-            "saved_path": None,
-            "markdown_type": None,
-            "content_length": 0,
-            "content_preview": None,
-            "domain": urlparse(base_url).netloc
-        })
+        results.append(new_result(base_url, error=str(e)))
     
     finally:
-        # Clean up temp file
-        if 'temp_config_path' in locals() and os.path.exists(temp_config_path):
-            os.unlink(temp_config_path)
+        # Don't leave the crawler running if reading its output failed
+        if 'process' in locals() and process.poll() is None:
+            process.kill()
+            process.wait()
     
     return results
 
@@ -748,20 +694,21 @@ def render_input_section():
                     if upload_file is not None:
                         urls_from_file = upload_file.getvalue().decode("utf-8")
                         urls_input = urls_from_file
-                        st.success(f"Loaded {len(urls_input.strip().split())} URLs from file")
                 
                 if urls_input:
-                    urls = []
-                    for line in urls_input.strip().split("\n"):
-                        url = line.strip()
-                        if url and is_valid_url(url):
-                            urls.append(url)
+                    urls, total_lines, duplicates = parse_url_list(urls_input)
+                    if upload_file is not None:
+                        with col2:
+                            st.success(f"Loaded {total_lines} URLs from file")
                     
                     if urls:
                         base_url = urls[0]
                         st.info(f"Found {len(urls)} valid URLs")
-                        if len(urls) < len(urls_input.strip().split("\n")):
-                            st.warning(f"{len(urls_input.strip().split()) - len(urls)} URLs were invalid and will be skipped")
+                        if duplicates:
+                            st.info(f"Removed {duplicates} duplicate URLs")
+                        invalid = total_lines - len(urls) - duplicates
+                        if invalid:
+                            st.warning(f"{invalid} URLs were invalid and will be skipped")
                             
                         # Show URL preview
                         with st.expander("Preview URLs"):
@@ -789,30 +736,33 @@ def render_crawler_settings(input_type: str):
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            pruning_threshold = st.slider(
+            st.slider(
                 "Pruning Threshold",
                 min_value=0.0,
                 max_value=1.0,
                 value=0.35,
                 step=0.05,
-                help="Lower values keep more content, higher values prune more aggressively"
+                help="Lower values keep more content, higher values prune more aggressively",
+                key="pruning_threshold"
             )
         
         with col2:
-            pruning_type = st.selectbox(
+            st.selectbox(
                 "Pruning Type",
                 options=["dynamic", "fixed"],
                 index=0,
-                help="Dynamic adjusts threshold based on content, fixed uses exact threshold"
+                help="Dynamic adjusts threshold based on content, fixed uses exact threshold",
+                key="pruning_type"
             )
         
         with col3:
-            min_word_threshold = st.number_input(
+            st.number_input(
                 "Minimum Words per Block",
                 min_value=0,
                 max_value=100,
                 value=5,
-                help="Text blocks with fewer words than this will be pruned"
+                help="Text blocks with fewer words than this will be pruned",
+                key="min_word_threshold"
             )
         
         # HTML processing options
@@ -820,24 +770,27 @@ def render_crawler_settings(input_type: str):
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            process_iframes = st.checkbox(
+            st.checkbox(
                 "Process iframes", 
                 value=True,
-                help="Extract content from iframes"
+                help="Extract content from iframes",
+                key="process_iframes"
             )
         
         with col2:
-            remove_overlays = st.checkbox(
+            st.checkbox(
                 "Remove overlay elements", 
                 value=True,
-                help="Remove cookie notices, popups, etc."
+                help="Remove cookie notices, popups, etc.",
+                key="remove_overlays"
             )
         
         with col3:
-            escape_html = st.checkbox(
+            st.checkbox(
                 "Escape HTML", 
                 value=True,
-                help="Convert HTML entities to safe representations"
+                help="Convert HTML entities to safe representations",
+                key="escape_html"
             )
         
         # Tags to keep/exclude
@@ -845,112 +798,138 @@ def render_crawler_settings(input_type: str):
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            keep_nav = st.checkbox("Keep navigation", value=False)
+            st.checkbox("Keep navigation", value=False, key="keep_nav")
         
         with col2:
-            keep_header = st.checkbox("Keep headers", value=False)
+            st.checkbox("Keep headers", value=False, key="keep_header")
         
         with col3:
-            keep_footer = st.checkbox("Keep footers", value=False)
-        
-        keep_tags = []
-        if keep_nav:
-            keep_tags.append("nav")
-        if keep_header:
-            keep_tags.append("header")
-        if keep_footer:
-            keep_tags.append("footer")
+            st.checkbox("Keep footers", value=False, key="keep_footer")
         
         # Link processing
         st.markdown("#### Link Processing")
-        ignore_links = st.checkbox(
+        st.checkbox(
             "Ignore links", 
             value=False,
-            help="Don't include links in the markdown output"
+            help="Don't include links in the markdown output",
+            key="ignore_links"
         )
     
     # Query-based filtering (BM25) - for all modes
     with st.expander("Query-Based Filtering (Optional)"):
-        use_query = st.checkbox(
+        st.checkbox(
             "Filter content by relevance to query", 
             value=False,
-            help="Use BM25 algorithm to keep only content relevant to your query"
+            help="Use BM25 algorithm to keep only content relevant to your query",
+            key="use_query"
         )
         
-        query = ""
-        query_threshold = 1.2
-        
-        if use_query:
+        if st.session_state.use_query:
             col1, col2 = st.columns([3, 1])
             
             with col1:
-                query = st.text_input(
+                st.text_input(
                     "Query", 
                     placeholder="Enter search terms",
-                    help="Content will be filtered based on relevance to these terms"
+                    help="Content will be filtered based on relevance to these terms",
+                    key="query"
                 )
             
             with col2:
-                query_threshold = st.slider(
+                st.slider(
                     "Relevance Threshold",
                     min_value=0.1,
                     max_value=5.0,
                     value=1.2,
                     step=0.1,
-                    help="Higher values require stronger relevance to query"
+                    help="Higher values require stronger relevance to query",
+                    key="query_threshold"
                 )
     
+    # Reuse of previously scraped pages and crawl parallelism
+    with st.expander("Caching & Performance"):
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.number_input(
+                "Cache TTL (seconds)",
+                min_value=0,
+                value=CACHE_TTL,
+                step=600,
+                help="Pages scraped with the same settings within this time are reused instead of crawled again (0 disables)",
+                key="cache_ttl"
+            )
+        
+        with col2:
+            st.checkbox(
+                "Force re-scrape",
+                value=False,
+                help="Ignore cached pages and crawl everything again",
+                key="force_rescrape"
+            )
+        
+        with col3:
+            st.number_input(
+                "Parallel Pages",
+                min_value=1,
+                max_value=32,
+                value=MAX_CONCURRENT,
+                help="Number of pages crawled at the same time in batch and sitemap scrapes",
+                key="max_concurrent"
+            )
+    
     # Deep crawl settings (only for website crawl)
-    deep_crawl_settings = {}
     if input_type == "Website Crawl":
         with st.expander("Crawler Behavior", expanded=True):
             col1, col2 = st.columns(2)
             
             with col1:
-                deep_crawl_settings["max_depth"] = st.number_input(
+                st.number_input(
                     "Maximum Crawl Depth",
                     min_value=1,
                     max_value=10,
                     value=2,
-                    help="How many clicks/links deep to crawl from the starting page"
+                    help="How many clicks/links deep to crawl from the starting page",
+                    key="max_depth"
                 )
             
             with col2:
-                deep_crawl_settings["max_pages"] = st.number_input(
+                st.number_input(
                     "Maximum Pages",
                     min_value=1,
                     max_value=500,
                     value=20,
-                    help="Maximum number of pages to crawl"
+                    help="Maximum number of pages to crawl",
+                    key="max_pages"
                 )
             
-            deep_crawl_settings["include_external"] = st.checkbox(
+            st.checkbox(
                 "Include External Links",
                 value=False,
-                help="Follow links to external domains (may increase crawl time significantly)"
+                help="Follow links to external domains (may increase crawl time significantly)",
+                key="include_external"
             )
             
-            deep_crawl_settings["try_sitemap"] = st.checkbox(
+            st.checkbox(
                 "Try to find sitemap first",
                 value=True,
-                help="Attempt to locate and use the website's sitemap before falling back to deep crawling"
+                help="Attempt to locate and use the website's sitemap before falling back to deep crawling",
+                key="try_sitemap"
             )
     
-    # Combine all settings
-    settings = {
-        "pruning_threshold": pruning_threshold,
-        "pruning_type": pruning_type,
-        "min_word_threshold": min_word_threshold,
-        "process_iframes": process_iframes,
-        "remove_overlays": remove_overlays,
-        "escape_html": escape_html,
-        "keep_tags": keep_tags,
-        "ignore_links": ignore_links,
-        "use_query": use_query,
-        "query": query,
-        "query_threshold": query_threshold,
-        "deep_crawl_settings": deep_crawl_settings
-    }
+    # Combine all settings from the widget values stored under their keys
+    settings = {key: st.session_state[key] for key in SETTING_KEYS}
+    settings["keep_tags"] = [tag for tag in ("nav", "header", "footer") if st.session_state[f"keep_{tag}"]]
+    if settings["use_query"]:
+        settings["query"] = st.session_state.query
+        settings["query_threshold"] = st.session_state.query_threshold
+    else:
+        settings["query"] = ""
+        settings["query_threshold"] = 1.2
+    settings["deep_crawl_settings"] = (
+        {key: st.session_state[key] for key in DEEP_CRAWL_SETTING_KEYS}
+        if input_type == "Website Crawl" else {}
+    )
     
     return settings
 
@@ -968,6 +947,13 @@ def start_scraping(input_type: str, urls: List[str], base_url: str, settings: Di
         # Create a results placeholder
         results_placeholder = st.empty()
         
+        def batch_progress(start: int):
+            """Progress callback filling the bar from start% to 100% as URLs complete."""
+            def update(done: int, total: int):
+                progress_bar.progress(start + (100 - start) * done // total)
+                progress_text.text(f"Scraped {done} of {total} URLs...")
+            return update
+        
         if input_type == "Single URL" and urls:
             with progress_container.container():
                 st.markdown(f"<h3>Scraping {urls[0]}</h3>", unsafe_allow_html=True)
@@ -975,7 +961,7 @@ def start_scraping(input_type: str, urls: List[str], base_url: str, settings: Di
             progress_text.text("Initializing scraper...")
             progress_bar.progress(10)
             
-            # Run the scraper using subprocess
+            # Run the scraper in-process
             result = scrape_single_url(urls[0], settings)
             
             progress_bar.progress(100)
@@ -992,7 +978,7 @@ def start_scraping(input_type: str, urls: List[str], base_url: str, settings: Di
             progress_bar.progress(10)
             
             # Start the scraping process
-            results = scrape_multiple_urls(urls, settings)
+            results = scrape_multiple_urls(urls, settings, progress=batch_progress(10))
             
             # Update progress
             progress_bar.progress(100)
@@ -1047,7 +1033,7 @@ def start_scraping(input_type: str, urls: List[str], base_url: str, settings: Di
                         progress_bar.progress(30)
                         
                         # Start the scraping process
-                        results = scrape_multiple_urls(sitemap_urls, settings)
+                        results = scrape_multiple_urls(sitemap_urls, settings, progress=batch_progress(30))
                         
                         # Update progress
                         progress_bar.progress(100)
@@ -1073,108 +1059,108 @@ def start_scraping(input_type: str, urls: List[str], base_url: str, settings: Di
     
     return None
 
+@st.cache_data
+def results_csv(df: pd.DataFrame) -> bytes:
+    """Encode the results table as CSV; reruns reuse the bytes until the results change."""
+    return df.to_csv(index=False).encode('utf-8')
+
+@st.cache_data
+def results_parquet(df: pd.DataFrame) -> bytes:
+    """Encode the results table as compressed Parquet (via pyarrow), much smaller than CSV for large crawls."""
+    return df.to_parquet(index=False, engine="pyarrow", compression="zstd")
+
 def render_results(results: List[Dict[str, Any]]):
     """Render the scraping results nicely."""
     if not results:
         return
     
-    # Count successes and failures
-    successes = sum(1 for r in results if r.get("success", False))
+    # Gather the metrics, table columns and files by domain in a single
+    # pass over the results
+    successes = 0
+    total_content = 0
+    columns = {name: [] for name in ("№", "URL", "Status", "Content Type", "Size", "Domain", "Error", "Saved Path")}
+    domain_folders = {}
+    
+    for i, result in enumerate(results):
+        success = result.get("success", False)
+        content_length = result.get("content_length", 0)
+        domain = result.get("domain", "unknown")
+        error = result.get("error", "")
+        
+        if success:
+            successes += 1
+            total_content += content_length
+            if result.get("saved_path"):
+                # Label for the file list: last path segment of the URL
+                basename = result.get("url", "").rstrip("/").rsplit("/", 1)[-1] or domain
+                domain_folders.setdefault(domain, []).append((result, basename))
+        
+        columns["№"].append(i + 1)
+        columns["URL"].append(result.get("url", "Unknown URL"))
+        columns["Status"].append("✅ Success" if success else "❌ Failed")
+        columns["Content Type"].append(result.get("markdown_type", "None"))
+        columns["Size"].append(content_length)
+        columns["Domain"].append(domain)
+        columns["Error"].append(error)
+        columns["Saved Path"].append(result.get("saved_path", ""))
+    
     failures = len(results) - successes
-    total_content = sum(r.get("content_length", 0) for r in results if r.get("success", False))
+    
+    # Format the sizes for the whole column at once
+    lengths = np.asarray(columns["Size"], dtype=np.int64)
+    columns["Size"] = np.where(
+        lengths == 0, "0 KB",
+        np.where(lengths < 1000000, np.char.mod("%.1f KB", lengths / 1000), np.char.mod("%.1f MB", lengths / 1000000))
+    )
     
     # Show metrics
     st.markdown("---")
     st.markdown('<h2 class="sub-header">Scraping Results</h2>', unsafe_allow_html=True)
     
     with st.container():
-        st.markdown('<div class="metrics-container">', unsafe_allow_html=True)
-        
         col1, col2, col3, col4 = st.columns(4)
+        size_display = f"{total_content/1000:.1f}K" if total_content < 1000000 else f"{total_content/1000000:.1f}M"
         
-        with col1:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{len(results)}</div>
-                <div class="metric-label">Total URLs</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{successes}</div>
-                <div class="metric-label">Successful</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{failures}</div>
-                <div class="metric-label">Failed</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col4:
-            size_display = f"{total_content/1000:.1f}K" if total_content < 1000000 else f"{total_content/1000000:.1f}M"
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{size_display}</div>
-                <div class="metric-label">Content Size</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Create a DataFrame for easier display
-    results_data = []
+        col1.metric("Total URLs", len(results))
+        col2.metric("Successful", successes)
+        col3.metric("Failed", failures)
+        col4.metric("Content Size", size_display)
     
-    for i, result in enumerate(results):
-        url = result.get("url", "Unknown URL")
-        status = "✅ Success" if result.get("success", False) else "❌ Failed"
-        markdown_type = result.get("markdown_type", "None")
-        content_length = result.get("content_length", 0)
-        content_size = f"{content_length/1000:.1f} KB" if content_length else "0 KB"
-        error = result.get("error", "")
-        saved_path = result.get("saved_path", "")
-        domain = result.get("domain", "unknown")
-        
-        results_data.append({
-            "№": i+1,
-            "URL": url,
-            "Status": status,
-            "Content Type": markdown_type,
-            "Size": content_size,
-            "Domain": domain,
-            "Error": error,
-            "Saved Path": saved_path
-        })
+    # Create a DataFrame for easier display, from the column lists; the
+    # low-cardinality text columns are stored as categories
+    df = pd.DataFrame(columns).astype({
+        "№": "int32",
+        "Status": "category",
+        "Content Type": "category",
+        "Domain": "category"
+    })
     
     # Display results as a dataframe with option to download
-    if results_data:
-        df = pd.DataFrame(results_data)
-        
-        # Option to download results as CSV
-        csv = df.to_csv(index=False).encode('utf-8')
-        st.download_button(
+    if not df.empty:
+        # Option to download results as CSV or Parquet
+        col1, col2 = st.columns(2)
+        col1.download_button(
             label="Download results as CSV",
-            data=csv,
+            data=results_csv(df),
             file_name="scraping_results.csv",
             mime="text/csv",
         )
+        col2.download_button(
+            label="Download results as Parquet",
+            data=results_parquet(df),
+            file_name="scraping_results.parquet",
+            mime="application/vnd.apache.parquet",
+        )
         
-        # Show the results table
-        st.dataframe(df, use_container_width=True)
-        
-        # Group files by domain folder
-        domain_folders = {}
-        for result in results:
-            if result.get("success") and result.get("saved_path"):
-                domain = result.get("domain", "unknown")
-                if domain not in domain_folders:
-                    domain_folders[domain] = []
-                domain_folders[domain].append(result)
+        # Show the results table; failures are a filter of the same table
+        # rather than a second one
+        show_failures = failures > 0 and st.checkbox(f"Show only failures ({failures})", key="show_only_failures")
+        st.dataframe(
+            df[df["Status"] == "❌ Failed"] if show_failures else df,
+            use_container_width=True,
+            hide_index=True,
+            column_config={"Error": st.column_config.TextColumn(width="medium")}
+        )
         
         # Show saved files by domain
         if domain_folders:
@@ -1186,31 +1172,18 @@ def render_results(results: List[Dict[str, Any]]):
                 with tabs[i]:
                     st.markdown(f"Found {len(domain_results)} files for **{domain}**")
                     
-                    for j, result in enumerate(domain_results):
-                        if j < 10:  # Limit the number of expandable previews
-                            with st.expander(f"{j+1}. {Path(result['url']).name}"):
-                                st.markdown(f"**URL:** {result['url']}")
-                                st.markdown(f"**Saved to:** {result['saved_path']}")
-                                st.markdown("**Content Preview:**")
-                                st.markdown(result["content_preview"])
-                        elif j == 10:
-                            st.write("... and more files (preview limited to 10 files)")
-                            break
-        
-        # Show error summary if there were failures
-        if failures > 0:
-            st.markdown("### Error Summary")
-            
-            error_data = []
-            for result in results:
-                if not result.get("success", False) and result.get("error"):
-                    error_data.append({
-                        "URL": result.get("url", "Unknown"),
-                        "Error": result.get("error", "Unknown error")
-                    })
-            
-            if error_data:
-                st.dataframe(pd.DataFrame(error_data), use_container_width=True)
+                    # Only the selected file is rendered, however many there are
+                    j = st.selectbox(
+                        "File",
+                        options=range(len(domain_results)),
+                        format_func=lambda j, files=domain_results: f"{j+1}. {files[j][1]}",
+                        key=f"file_select_{i}"
+                    )
+                    result = domain_results[j][0]
+                    st.markdown(f"**URL:** {result['url']}")
+                    st.markdown(f"**Saved to:** {result['saved_path']}")
+                    st.markdown("**Content Preview:**")
+                    st.markdown(result["content_preview"])
 
 
 def main():
@@ -1267,10 +1240,20 @@ def main():
             with st.spinner("Scraping in progress..."):
                 results = start_scraping(input_type, urls, base_url, settings)
                 st.session_state.scrape_results = results
+                # Files selected in the previous results don't apply to these
+                for key in [k for k in st.session_state.keys() if k.startswith("file_select_")]:
+                    del st.session_state[key]
     
     # Display results if available
     if st.session_state.scrape_results:
         render_results(st.session_state.scrape_results)
+    
+    # Warm up the shared browser once the page is drawn, so the first scrape
+    # doesn't wait for crawl4ai and Chromium to start
+    try:
+        get_scrape_worker()
+    except Exception as e:
+        st.warning(f"Could not start the browser: {e}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
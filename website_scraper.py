@@ -1,52 +1,225 @@
 import asyncio
+import hashlib
+import json
+import logging
+import logging.handlers
 import os
 import re
+import sys
+from functools import lru_cache
 from urllib.parse import urlparse
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
 from crawl4ai.content_filter_strategy import PruningContentFilter
 from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
 from crawl4ai.deep_crawling import BFSDeepCrawlStrategy
 from crawl4ai.content_scraping_strategy import LXMLWebScrapingStrategy
-import requests
-from xml.etree import ElementTree
+import aiohttp
+
+# lxml parses sitemaps in C; fall back to the standard library if it is missing
+try:
+    from lxml import etree as ElementTree
+    HAS_LXML = True
+except ImportError:
+    from xml.etree import ElementTree
+    HAS_LXML = False
 
 # =====================
 # CONFIGURATION SECTION
 # =====================
 
+# Every value can be overridden with a WS_<NAME> environment variable
+# (e.g. WS_TARGET_URL, WS_MAX_DEPTH), which is how the UI passes its settings.
+
 # --- User Parameters ---
-CRAWL_MODE = "single"  # "single" or "deep"
-TARGET_URL = "https://lebotfrancais.framer.website"  # Change to your target
+CRAWL_MODE = os.environ.get("WS_CRAWL_MODE", "single")  # "single" or "deep"
+TARGET_URL = os.environ.get("WS_TARGET_URL", "https://lebotfrancais.framer.website")  # Change to your target
+TRY_SITEMAP = os.environ.get("WS_TRY_SITEMAP", "1") == "1"  # Look for a sitemap before crawling
 # For deep crawl only:
-MAX_DEPTH = 2
-MAX_PAGES = 20
-INCLUDE_EXTERNAL = False
+MAX_DEPTH = int(os.environ.get("WS_MAX_DEPTH", 2))
+MAX_PAGES = int(os.environ.get("WS_MAX_PAGES", 20))
+INCLUDE_EXTERNAL = os.environ.get("WS_INCLUDE_EXTERNAL", "0") == "1"
+# For sitemap crawls: pages fetched at the same time
+MAX_CONCURRENT = int(os.environ.get("WS_MAX_CONCURRENT", 5))
+# For sitemap crawls: crawl pages again even if they were already saved with
+# the same pruning settings
+FORCE_REFRESH = os.environ.get("WS_FORCE_REFRESH", "0") == "1"
 
 # Pruning filter parameters
-PRUNING_THRESHOLD = 0.48  # 0.0 (keep more) to 1.0 (prune more)
-PRUNING_TYPE = "dynamic"  # "fixed" or "dynamic"
-MIN_WORD_THRESHOLD = 10
+PRUNING_THRESHOLD = float(os.environ.get("WS_PRUNING_THRESHOLD", 0.48))  # 0.0 (keep more) to 1.0 (prune more)
+PRUNING_TYPE = os.environ.get("WS_PRUNING_TYPE", "dynamic")  # "fixed" or "dynamic"
+MIN_WORD_THRESHOLD = int(os.environ.get("WS_MIN_WORD_THRESHOLD", 10))
 
 # =====================
 
+# Flags for writing a page's markdown (binary mode matters on Windows)
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
 
-def get_domain_folder(url: str) -> str:
-    parsed = urlparse(url)
-    domain = parsed.netloc.replace(":", "_")
+# Local names of sitemap entries; only their own <loc> child is read, so
+# nested extension tags like <image:loc> are not taken for pages, whatever
+# namespace (or version) the sitemap itself uses
+SITEMAP_ENTRY_TAGS = ("url", "sitemap")
+
+# Per-domain-folder record of the pages saved by sitemap crawls and the
+# settings they were saved with
+SAVED_PAGES_INDEX = ".saved_pages.json"
+
+# Bytes of a sitemap response read (and parsed) at a time
+SITEMAP_READ_CHUNK = 64 * 1024
+
+# With --machine-readable, page outcomes are printed as one JSON object per line
+MACHINE_READABLE = "--machine-readable" in sys.argv[1:]
+
+# Per-page log lines are buffered and written to stdout in batches of
+# LOG_BATCH_SIZE (errors flush at once), instead of one write per page
+LOG_BATCH_SIZE = 50
+logger = logging.getLogger("website_scraper")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_console = logging.StreamHandler(sys.stdout)
+_console.setFormatter(logging.Formatter("%(message)s"))
+_LOG_BUFFER = logging.handlers.MemoryHandler(LOG_BATCH_SIZE, target=_console)
+logger.addHandler(_LOG_BUFFER)
+
+# Browser shared by every page of a run
+BROWSER_CONFIG = BrowserConfig(headless=True, verbose=not MACHINE_READABLE)
+
+# Characters not allowed in generated filenames
+_SANITIZE_RE = re.compile(r'[^a-zA-Z0-9_\-]+')
+
+# Ignored when comparing page contents (layout whitespace only: pages that
+# differ just in numbers, e.g. product or invoice pages, are different pages)
+_DIGEST_STRIP_RE = re.compile(r'\s+')
+
+
+def report_page(url: str, out_path: str = None, error: str = None, content: str = ""):
+    """Print the outcome of one page (with its length and preview when machine-readable)."""
+    if MACHINE_READABLE:
+        print(json.dumps({
+            "event": "page", "url": url, "ok": error is None, "path": out_path, "error": error,
+            "content_length": len(content),
+            "content_preview": content[:500] + "..." if len(content) > 500 else content
+        }), flush=True)
+    elif error is None:
+        logger.info(f"[OK] {url} -> {out_path}")
+    else:
+        logger.error(f"[ERROR] {url}: {error}")
+
+def report_done(message: str, folder: str):
+    """Print the end-of-crawl summary and the folder the markdown was saved in."""
+    _LOG_BUFFER.flush()
+    if MACHINE_READABLE:
+        print(json.dumps({"event": "done", "folder": folder}), flush=True)
+    else:
+        print(f"[DONE] {message}. Markdown saved in: {folder}")
+
+
+def duplicate_of(url: str, content: str, seen: dict):
+    """
+    Return the URL of an earlier page with the same content (ignoring
+    whitespace), or None after remembering this page's digest.
+    """
+    digest = hashlib.sha1(_DIGEST_STRIP_RE.sub('', content).encode("utf-8")).digest()
+    if digest in seen:
+        return seen[digest]
+    seen[digest] = url
+    return None
+
+def add_new_url(url: str, urls: list, seen: set):
+    """
+    Append url to urls unless it is already listed. seen holds 64-bit
+    fingerprints rather than the URL strings, so deduplicating a huge
+    sitemap costs a few bytes per entry on top of the list itself.
+    """
+    key = int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big")
+    if key not in seen:
+        seen.add(key)
+        urls.append(url)
+
+@lru_cache(maxsize=4096)
+def _parse_url(url: str):
+    """Parse a URL once; a page's URL is looked at for its folder and its filename."""
+    return urlparse(url)
+
+def _folder_for_netloc(domain: str) -> str:
+    """Create (if needed) and return the folder for a domain."""
     folder = os.path.join(os.getcwd(), domain)
     os.makedirs(folder, exist_ok=True)
     return folder
 
+def get_domain_folder(url: str) -> str:
+    return _folder_for_netloc(_parse_url(url).netloc.replace(":", "_"))
+
 def url_to_filename(url: str) -> str:
-    parsed = urlparse(url)
+    parsed = _parse_url(url)
     # Use path, remove slashes, fallback to 'index' if empty
     path = parsed.path.strip("/").replace("/", "_")
     if not path:
         path = "index"
     # Remove query/fragment
-    path = re.sub(r'[^a-zA-Z0-9_\-]', '', path)
+    path = _SANITIZE_RE.sub('', path)
     return path + ".md"
 
+def _write_file(path: str, content: str):
+    # Encoded once and handed to the OS as raw bytes, without a text-file wrapper
+    data = memoryview(content.encode("utf-8"))
+    fd = os.open(path, _WRITE_FLAGS, 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+async def write_markdown(path: str, content: str):
+    """Write a page's markdown from a worker thread, so other crawls keep running meanwhile."""
+    await asyncio.get_running_loop().run_in_executor(None, _write_file, path, content)
+
+async def save_page(url: str, out_path: str, content: str) -> bool:
+    """Write a crawled page's markdown and report the outcome; True if it was saved."""
+    try:
+        await write_markdown(out_path, content)
+    except (OSError, UnicodeError) as e:
+        report_page(url, error=f"Failed to save {out_path}: {e}")
+        return False
+    report_page(url, out_path, content=content)
+    return True
+
+def settings_fingerprint() -> list:
+    """The settings that shape a page's markdown, as stored in the saved-pages index."""
+    return [PRUNING_THRESHOLD, PRUNING_TYPE, MIN_WORD_THRESHOLD]
+
+def is_saved(entry, settings: list) -> bool:
+    """
+    True if a saved-pages entry was saved with these settings and its file
+    still holds that markdown (it may since have been overwritten, e.g. by a
+    single or deep crawl of the same page).
+    """
+    if not entry or entry.get("settings") != settings:
+        return False
+    h = hashlib.sha1()
+    try:
+        with open(entry["path"], "rb") as f:
+            for chunk in iter(lambda: f.read(SITEMAP_READ_CHUNK), b""):
+                h.update(chunk)
+    except OSError:
+        return False
+    return h.hexdigest() == entry.get("digest")
+
+def load_saved_pages(folder: str) -> dict:
+    """Load a domain folder's saved-pages index (requested URL -> path and settings)."""
+    try:
+        with open(os.path.join(folder, SAVED_PAGES_INDEX), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_saved_pages(folder: str, saved: dict):
+    """Write a domain folder's saved-pages index atomically."""
+    path = os.path.join(folder, SAVED_PAGES_INDEX)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(saved, f)
+    os.replace(tmp_path, path)
+
 def guess_sitemap_urls(base_url: str):
     """
     Try common sitemap locations for a given base URL.
@@ -62,74 +235,201 @@ def guess_sitemap_urls(base_url: str):
         f"{root}/sitemapindex.xml",
     ]
 
-def fetch_sitemap_urls(base_url: str):
+def _entry_loc(entry):
+    """Text of a sitemap entry's own <loc> child, or None."""
+    for child in entry:
+        if isinstance(child.tag, str) and child.tag.rsplit("}", 1)[-1] == "loc":
+            return (child.text or "").strip() or None
+    return None
+
+async def iter_locs(chunks):
     """
-    Attempts to fetch and parse sitemap URLs from common locations.
-    Returns a list of discovered URLs, or an empty list if none found.
+    Yield (kind, loc) for every entry of a sitemap as its chunks arrive, where
+    kind is "sitemap" for the entries of a sitemap index and "url" for pages.
+    Entries are released as they go, so memory stays flat however many
+    entries the sitemap has.
     """
-    sitemap_urls = guess_sitemap_urls(base_url)
-    found_urls = set()
-    for sitemap_url in sitemap_urls:
-        try:
-            resp = requests.get(sitemap_url, timeout=10)
-            if resp.status_code != 200:
-                continue
+    if HAS_LXML:
+        parser = ElementTree.XMLPullParser(events=("end",), tag=tuple(f"{{*}}{name}" for name in SITEMAP_ENTRY_TAGS),
+                                           recover=True, huge_tree=True)
+    else:
+        parser = ElementTree.XMLPullParser(events=("start", "end"))
+    root = None
+
+    def read_locs():
+        nonlocal root
+        for event, elem in parser.read_events():
+            if not HAS_LXML:
+                if root is None:
+                    root = elem
+                if event != "end" or elem.tag.rsplit("}", 1)[-1] not in SITEMAP_ENTRY_TAGS:
+                    continue
+            loc = _entry_loc(elem)
+            if loc:
+                yield elem.tag.rsplit("}", 1)[-1], loc
+            if HAS_LXML:
+                # Also drop the entries already read, which the root would
+                # otherwise keep as empty shells
+                elem.clear(keep_tail=True)
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+            else:
+                # Every entry read so far is done with
+                root.clear()
+
+    async for chunk in chunks:
+        parser.feed(chunk)
+        for entry in read_locs():
+            yield entry
+    parser.close()
+    for entry in read_locs():
+        yield entry
+
+async def fetch_sitemap(session: aiohttp.ClientSession, sitemap_url: str, expand_index: bool = True) -> list:
+    """
+    Fetch one candidate sitemap and return the page URLs it lists (empty if
+    unavailable). The body is parsed while it downloads, never held whole.
+    The sub-sitemaps of a sitemap index are fetched too (one level deep).
+    """
+    found_urls = []
+    seen = set()
+    sub_sitemaps = []
+    try:
+        async with session.get(sitemap_url) as resp:
+            if resp.status != 200:
+                return found_urls
             content_type = resp.headers.get('Content-Type', '')
-            text = resp.text
+            head = await resp.content.read(SITEMAP_READ_CHUNK)
+
+            async def body():
+                yield head
+                async for chunk in resp.content.iter_chunked(SITEMAP_READ_CHUNK):
+                    yield chunk
+
             # XML sitemap
-            if 'xml' in content_type or text.strip().startswith('<?xml'):
+            if 'xml' in content_type or head.lstrip().startswith(b'<?xml'):
                 try:
-                    root = ElementTree.fromstring(resp.content)
-                    # Try <loc> tags (standard sitemap)
-                    for loc in root.findall('.//{*}loc'):
-                        if loc.text:
-                            found_urls.add(loc.text.strip())
+                    # Try <loc> tags (standard sitemap or sitemap index)
+                    async for kind, loc in iter_locs(body()):
+                        if kind == "sitemap":
+                            sub_sitemaps.append(loc)
+                        else:
+                            add_new_url(loc, found_urls, seen)
+                except (asyncio.TimeoutError, aiohttp.ClientError):
+                    raise  # Download problems are reported below
                 except Exception:
-                    continue
+                    pass
             # Plain text sitemap
             elif 'text/plain' in content_type or sitemap_url.endswith('.txt'):
-                for line in text.splitlines():
-                    line = line.strip()
-                    if line.startswith('http'):
-                        found_urls.add(line)
-        except Exception:
-            continue
-    return list(found_urls)
+                def add_lines(lines):
+                    for line in lines:
+                        line = line.decode('utf-8', errors='replace').strip()
+                        if line.startswith('http'):
+                            add_new_url(line, found_urls, seen)
 
-async def crawl_single(url: str):
-    print(f"[Single Crawl] {url}")
-    folder = get_domain_folder(url)
-    filename = url_to_filename(url)
-    out_path = os.path.join(folder, filename)
+                pending = b""
+                async for chunk in body():
+                    # The last line may continue in the next chunk
+                    *lines, pending = (pending + chunk).split(b"\n")
+                    add_lines(lines)
+                add_lines([pending])
+    except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+        if found_urls:
+            print(f"[WARN] Download of {sitemap_url} interrupted ({type(e).__name__}), "
+                  f"keeping the {len(found_urls)} URLs read so far")
+    except Exception:
+        pass
+
+    if sub_sitemaps and expand_index:
+        sub_sitemaps = list(dict.fromkeys(sub_sitemaps))
+        print(f"[INFO] {sitemap_url} is a sitemap index with {len(sub_sitemaps)} sub-sitemaps")
+        results = await asyncio.gather(*[fetch_sitemap(session, url, expand_index=False) for url in sub_sitemaps])
+        for page_urls in results:
+            for url in page_urls:
+                add_new_url(url, found_urls, seen)
+    return found_urls
+
+async def sitemaps_from_robots(session: aiohttp.ClientSession, base_url: str):
+    """Return the sitemap URLs declared by the site's robots.txt (Sitemap: lines)."""
+    parsed = urlparse(base_url)
+    try:
+        async with session.get(f"{parsed.scheme}://{parsed.netloc}/robots.txt") as resp:
+            if resp.status != 200:
+                return []
+            text = await resp.text(errors="replace")
+    except Exception:
+        return []
+    sitemaps = []
+    for line in text.splitlines():
+        key, _, value = line.partition(":")
+        if key.strip().lower() == "sitemap" and value.strip():
+            sitemaps.append(value.strip())
+    return list(dict.fromkeys(sitemaps))
 
+async def fetch_sitemap_urls(base_url: str):
+    """
+    Attempts to fetch and parse the sitemaps declared in robots.txt, or
+    else those at common locations.
+    Returns a list of discovered URLs, or an empty list if none found.
+    """
+    # The timeouts apply to each connect/read, so a large sitemap that keeps
+    # arriving is not cut off
+    timeout = aiohttp.ClientTimeout(sock_connect=10, sock_read=10)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        # The common locations are probed while robots.txt downloads, so a
+        # site without Sitemap: lines costs no extra round trip
+        guesses = {url: asyncio.ensure_future(fetch_sitemap(session, url)) for url in guess_sitemap_urls(base_url)}
+        declared = await sitemaps_from_robots(session, base_url)
+        if declared:
+            print(f"[INFO] robots.txt declares {len(declared)} sitemap(s)")
+            tasks = [guesses.pop(url, None) or fetch_sitemap(session, url) for url in declared]
+            for task in guesses.values():
+                task.cancel()
+            await asyncio.gather(*guesses.values(), return_exceptions=True)
+        else:
+            tasks = list(guesses.values())
+        results = await asyncio.gather(*tasks)
+    urls = []
+    seen = set()
+    for found_urls in results:
+        for url in found_urls:
+            add_new_url(url, urls, seen)
+    return urls
+
+@lru_cache(maxsize=1)
+def build_markdown_generator() -> DefaultMarkdownGenerator:
+    """Markdown generator shared by every crawl (the settings are fixed per run)."""
     prune_filter = PruningContentFilter(
         threshold=PRUNING_THRESHOLD,
         threshold_type=PRUNING_TYPE,
         min_word_threshold=MIN_WORD_THRESHOLD
     )
-    md_generator = DefaultMarkdownGenerator(content_filter=prune_filter)
-    config = CrawlerRunConfig(
-        markdown_generator=md_generator,
-        cache_mode=None  # Always fresh
+    return DefaultMarkdownGenerator(content_filter=prune_filter)
+
+@lru_cache(maxsize=1)
+def build_page_config() -> CrawlerRunConfig:
+    """Run config shared by the single-page and sitemap crawls."""
+    return CrawlerRunConfig(
+        markdown_generator=build_markdown_generator(),
+        cache_mode=None,  # Always fresh
+        verbose=not MACHINE_READABLE  # The UI only reads the JSON lines
     )
-    async with AsyncWebCrawler() as crawler:
-        result = await crawler.arun(url=url, config=config)
-        if result.success and result.markdown and result.markdown.fit_markdown:
-            with open(out_path, "w", encoding="utf-8") as f:
-                f.write(result.markdown.fit_markdown)
-            print(f"[OK] Saved fit markdown to: {out_path}")
-        else:
-            print(f"[ERROR] Failed to crawl {url}: {getattr(result, 'error_message', 'Unknown error')}")
 
-async def crawl_deep(url: str):
+async def crawl_single(crawler: AsyncWebCrawler, url: str):
+    print(f"[Single Crawl] {url}")
+    folder = get_domain_folder(url)
+    filename = url_to_filename(url)
+    out_path = os.path.join(folder, filename)
+
+    result = await crawler.arun(url=url, config=build_page_config())
+    if result.success and result.markdown and result.markdown.fit_markdown:
+        await save_page(url, out_path, result.markdown.fit_markdown)
+    else:
+        report_page(url, error=f"Failed to crawl {url}: {getattr(result, 'error_message', 'Unknown error')}")
+
+async def crawl_deep(crawler: AsyncWebCrawler, url: str):
     print(f"[Deep Crawl] {url}")
     folder = get_domain_folder(url)
-    prune_filter = PruningContentFilter(
-        threshold=PRUNING_THRESHOLD,
-        threshold_type=PRUNING_TYPE,
-        min_word_threshold=MIN_WORD_THRESHOLD
-    )
-    md_generator = DefaultMarkdownGenerator(content_filter=prune_filter)
     config = CrawlerRunConfig(
         deep_crawl_strategy=BFSDeepCrawlStrategy(
             max_depth=MAX_DEPTH,
@@ -137,58 +437,88 @@ async def crawl_deep(url: str):
             max_pages=MAX_PAGES
         ),
         scraping_strategy=LXMLWebScrapingStrategy(),
-        markdown_generator=md_generator,
+        markdown_generator=build_markdown_generator(),
         cache_mode=None,
         stream=True,
-        verbose=True
+        verbose=not MACHINE_READABLE  # The UI only reads the JSON lines
     )
-    async with AsyncWebCrawler() as crawler:
-        results = []
-        async for result in await crawler.arun(url, config=config):
-            results.append(result)
-            if result.success and result.markdown and result.markdown.fit_markdown:
-                filename = url_to_filename(result.url)
-                out_path = os.path.join(folder, filename)
-                with open(out_path, "w", encoding="utf-8") as f:
-                    f.write(result.markdown.fit_markdown)
-                print(f"[OK] {result.url} -> {out_path}")
-            else:
-                print(f"[ERROR] {getattr(result, 'url', url)}: {getattr(result, 'error_message', 'Unknown error')}")
-        print(f"[DONE] Crawled {len(results)} pages. Markdown saved in: {folder}")
+    seen_digests = {}  # Digest -> first URL, to skip pages repeating an earlier one
+    crawled = 0
+    writes = []
+    async for result in await crawler.arun(url, config=config):
+        crawled += 1
+        if result.success and result.markdown and result.markdown.fit_markdown:
+            first_url = duplicate_of(result.url, result.markdown.fit_markdown, seen_digests)
+            if first_url:
+                logger.info(f"[SKIP] {result.url}: same content as {first_url}")
+                continue
+            filename = url_to_filename(result.url)
+            out_path = os.path.join(folder, filename)
+            # Saved in the background, so the BFS stream keeps being consumed
+            writes.append(asyncio.ensure_future(save_page(result.url, out_path, result.markdown.fit_markdown)))
+        else:
+            report_page(getattr(result, 'url', url), error=getattr(result, 'error_message', 'Unknown error'))
+    await asyncio.gather(*writes)
+    report_done(f"Crawled {crawled} pages", folder)
 
-async def crawl_urls_from_sitemap(urls):
+async def crawl_urls_from_sitemap(crawler: AsyncWebCrawler, urls):
     print(f"[Sitemap] Crawling {len(urls)} URLs from sitemap...")
     if not urls:
         print("[Sitemap] No URLs found in sitemap.")
         return
     folder = get_domain_folder(urls[0])
-    prune_filter = PruningContentFilter(
-        threshold=PRUNING_THRESHOLD,
-        threshold_type=PRUNING_TYPE,
-        min_word_threshold=MIN_WORD_THRESHOLD
-    )
-    md_generator = DefaultMarkdownGenerator(content_filter=prune_filter)
-    config = CrawlerRunConfig(
-        markdown_generator=md_generator,
-        cache_mode=None,
-        verbose=True
-    )
-    async with AsyncWebCrawler() as crawler:
-        for url in urls:
+    saved = load_saved_pages(folder)
+    settings = settings_fingerprint()
+    if not FORCE_REFRESH:
+        # Pages saved by an earlier sitemap crawl with the same settings are not
+        # crawled again; the index is keyed by the requested URL, so redirected
+        # pages are found under the path they were actually saved to
+        pending = [url for url in urls if not is_saved(saved.get(url), settings)]
+        if len(pending) < len(urls):
+            print(f"[SKIP] {len(urls) - len(pending)} pages already saved in {folder} (WS_FORCE_REFRESH=1 crawls them again)")
+        urls = pending
+    config = build_page_config()
+    seen_digests = {}  # Digest -> first URL, to skip pages repeating an earlier one
+    sem = asyncio.Semaphore(max(1, MAX_CONCURRENT))
+
+    async def crawl_one(url):
+        # Up to MAX_CONCURRENT pages load at once in the shared browser
+        async with sem:
             result = await crawler.arun(url=url, config=config)
-            if result.success and result.markdown and result.markdown.fit_markdown:
-                filename = url_to_filename(result.url)
-                out_path = os.path.join(folder, filename)
-                with open(out_path, "w", encoding="utf-8") as f:
-                    f.write(result.markdown.fit_markdown)
-                print(f"[OK] {result.url} -> {out_path}")
-            else:
-                print(f"[ERROR] {getattr(result, 'url', url)}: {getattr(result, 'error_message', 'Unknown error')}")
-    print(f"[DONE] Crawled {len(urls)} sitemap URLs. Markdown saved in: {folder}")
+        if result.success and result.markdown and result.markdown.fit_markdown:
+            first_url = duplicate_of(result.url, result.markdown.fit_markdown, seen_digests)
+            if first_url:
+                logger.info(f"[SKIP] {result.url}: same content as {first_url}")
+                return
+            filename = url_to_filename(result.url)
+            out_path = os.path.join(folder, filename)
+            content = result.markdown.fit_markdown
+            if await save_page(result.url, out_path, content):
+                saved[url] = {"path": out_path, "settings": settings,
+                              "digest": hashlib.sha1(content.encode("utf-8")).hexdigest()}
+        else:
+            report_page(getattr(result, 'url', url), error=getattr(result, 'error_message', 'Unknown error'))
 
-async def main():
-    # Try to get sitemap URLs first
-    sitemap_urls = fetch_sitemap_urls(TARGET_URL)
+    try:
+        await asyncio.gather(*[crawl_one(url) for url in urls])
+    finally:
+        save_saved_pages(folder, saved)
+    report_done(f"Crawled {len(urls)} sitemap URLs", folder)
+
+async def crawl(sitemap_urls):
+    # One browser serves the whole run
+    async with AsyncWebCrawler(config=BROWSER_CONFIG) as crawler:
+        if sitemap_urls:
+            await crawl_urls_from_sitemap(crawler, sitemap_urls)
+        elif CRAWL_MODE == "single":
+            await crawl_single(crawler, TARGET_URL)
+        else:
+            await crawl_deep(crawler, TARGET_URL)
+
+def main():
+    # Try to get sitemap URLs first; the prompt below runs between the two
+    # event loops so it never blocks a running one
+    sitemap_urls = asyncio.run(fetch_sitemap_urls(TARGET_URL)) if TRY_SITEMAP else []
     if sitemap_urls:
         print(f"[INFO] Discovered {len(sitemap_urls)} pages in sitemap.")
         try:
@@ -199,15 +529,22 @@ async def main():
         except Exception:
             print("[WARN] Invalid input, scraping all pages.")
         print(f"[INFO] Scraping {len(sitemap_urls)} pages...")
-        await crawl_urls_from_sitemap(sitemap_urls)
     else:
-        print("[WARN] No sitemap found, falling back to deep crawl.")
-        if CRAWL_MODE == "single":
-            await crawl_single(TARGET_URL)
-        elif CRAWL_MODE == "deep":
-            await crawl_deep(TARGET_URL)
-        else:
+        if TRY_SITEMAP:
+            print("[WARN] No sitemap found, falling back to deep crawl.")
+        if CRAWL_MODE not in ("single", "deep"):
             print("[ERROR] Unknown CRAWL_MODE. Use 'single' or 'deep'.")
+            return
+
+    asyncio.run(crawl(sitemap_urls))
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvloop, when installed, gives a faster event loop for the crawl's many
+    # sockets; only set here so importing this module never changes the loop
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
+    main()